@@ -26,7 +26,14 @@ class CartModalComponent extends Component{
     let cartItems = this.props.cartItems.map(product => (
       <CSSTransition classNames="fadeIn" key={product.id} timeout={{ enter:500, exit: 300 }}>
         <tr>
-          <td><img src={product.image} style={imgStyle} /></td>
+          <td>
+            <img
+              src={product.image}
+              srcSet={product.images ? product.images.srcset : undefined}
+              sizes="100px"
+              style={imgStyle}
+            />
+          </td>
           <td>{product.name}</td>
           <td className="currency">{product.price}</td>
           <td>{product.quantity} шт.</td>
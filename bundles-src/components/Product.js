@@ -39,13 +39,26 @@ class Product extends Component{
 
   render(){
     let image = this.props.product.image;
+    let images = this.props.product.images;
     let name = this.props.product.name;
     let price = this.props.product.price;
     let id = this.props.product.id;
     return (
       <div className="product">
         <div className="product-image">
-          <img src={image} alt={name} onClick={this.quickView.bind(this)}/>
+          <picture>
+            {images && images.webp_srcset &&
+              <source type="image/webp" srcSet={images.webp_srcset} sizes="(max-width: 768px) 100vw, 320px"/>
+            }
+            <img
+              src={image}
+              srcSet={images ? images.srcset : undefined}
+              sizes="(max-width: 768px) 100vw, 320px"
+              alt={name}
+              loading="lazy"
+              onClick={this.quickView.bind(this)}
+            />
+          </picture>
         </div>
         <h4 className="product-name">{name}</h4>
         <p className="product-price currency">{price}</p>
@@ -18,6 +18,14 @@ python3 manage.py collectstatic --noinput
 echo Static files collected
 python3 manage.py migrate --noinput
 echo Migrations applied
+python3 manage.py copy_banner_images
+echo Banner images copied
+python3 manage.py prewarm_places
+echo Addresses geocoded
+python3 manage.py generate_renditions
+echo Product images resized
+python3 manage.py publish_catalog
+echo Catalog snapshots published
 sudo systemctl daemon-reload
 echo Reload systemd files
 sudo systemctl restart star-burger.service
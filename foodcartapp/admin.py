@@ -7,12 +7,31 @@ from django.utils.http import url_has_allowed_host_and_scheme
 
 from restaurateur.views import view_orders
 
+from .models import Banner
 from .models import Product
 from .models import ProductCategory
 from .models import Restaurant
 from .models import RestaurantMenuItem
 from .models import FoodCart
 from .models import Entry
+from .search import search_filter
+
+
+class NormalizedSearchMixin:
+    """Искать в админке по поисковым колонкам search_columns вместо icontains.
+
+    Колонки хранят текст, уже приведённый к нижнему регистру в Python,
+    поэтому поиск по кириллице работает и в SQLite, а в PostgreSQL его
+    ускоряют триграммные индексы. search_fields по-прежнему нужны, чтобы
+    админка показала строку поиска.
+    """
+    search_columns = []
+
+    def get_search_results(self, request, queryset, search_term):
+        condition = search_filter(search_term, *self.search_columns)
+        if condition is None:
+            return queryset, False
+        return queryset.filter(condition), False
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -31,6 +50,7 @@ class RestaurantAdmin(admin.ModelAdmin):
         'name',
         'address',
         'contact_phone',
+        'capacity',
     ]
     inlines = [
         RestaurantMenuItemInline
@@ -38,7 +58,7 @@ class RestaurantAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(NormalizedSearchMixin, admin.ModelAdmin):
     list_display = [
         'get_image_list_preview',
         'name',
@@ -52,11 +72,13 @@ class ProductAdmin(admin.ModelAdmin):
         'category',
     ]
     search_fields = [
-        # FIXME SQLite can not convert letter case for cyrillic words properly, so search will be buggy.
-        # Migration to PostgreSQL is necessary
         'name',
         'category__name',
     ]
+    search_columns = [
+        'search_name',
+        'category__search_name',
+    ]
 
     inlines = [
         RestaurantMenuItemInline
@@ -96,34 +118,80 @@ class ProductAdmin(admin.ModelAdmin):
     def get_image_preview(self, obj):
         if not obj.image:
             return 'выберите картинку'
-        return format_html('<img src="{url}" height="200"/>', url=obj.image.url)
+        return format_html('<img src="{url}" height="200"/>', url=obj.get_image_url(min_height=400))
     get_image_preview.short_description = 'превью'
 
     def get_image_list_preview(self, obj):
         if not obj.image or not obj.id:
             return 'нет картинки'
         edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
-        return format_html('<a href="{edit_url}"><img src="{src}" height="50"/></a>', edit_url=edit_url, src=obj.image.url)
+        return format_html('<a href="{edit_url}"><img src="{src}" height="50"/></a>', edit_url=edit_url, src=obj.get_image_url(min_height=100))
     get_image_list_preview.short_description = 'превью'
 
 
 @admin.register(ProductCategory)
-class ProductAdmin(admin.ModelAdmin):
-    pass
+class ProductAdmin(NormalizedSearchMixin, admin.ModelAdmin):
+    search_fields = [
+        'name',
+    ]
+    search_columns = [
+        'search_name',
+    ]
 
 
 class EntryInline(admin.TabularInline):
     model = Entry
 
 
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'order',
+        'active_from',
+        'active_until',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'order',
+    ]
+    readonly_fields = [
+        'get_image_preview',
+    ]
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return 'выберите картинку'
+        return format_html('<img src="{url}" height="200"/>', url=obj.image.url)
+    get_image_preview.short_description = 'превью'
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html('<img src="{src}" height="50"/>', src=obj.image.url)
+    get_image_list_preview.short_description = 'превью'
+
+
 @admin.register(FoodCart)
-class FoodCartAdmin(admin.ModelAdmin):
+class FoodCartAdmin(NormalizedSearchMixin, admin.ModelAdmin):
     list_display = [
         'firstname',
         'lastname',
         'address',
         'phonenumber',
     ]
+    search_fields = [
+        'firstname',
+        'lastname',
+        'phonenumber',
+        'address',
+    ]
+    search_columns = [
+        'search_text',
+    ]
     inlines = [EntryInline]
 
     def response_change(self, request, obj):
@@ -0,0 +1,74 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .changes import mark_orders_changed
+from .models import FoodCart, OrderRestaurantCandidate, Restaurant
+
+
+ACTIVE_STATUSES = ['Unprocessed', 'In progress']
+
+
+def match_orders(candidates, free_capacity):
+    """Жадно сопоставить заказы ресторанам по возрастанию расстояния.
+
+    candidates — пары (заказ, ресторан) с расстоянием в виде кортежей
+    (id заказа, id ресторана, расстояние). Самая короткая ещё доступная
+    пара назначается первой, пока у ресторана остаётся свободная ёмкость.
+    Возвращает словарь {id заказа: id ресторана}.
+    """
+    free_capacity = Counter(free_capacity)
+    assignments = {}
+    for order_id, restaurant_id, _ in sorted(candidates, key=lambda candidate: candidate[2]):
+        if order_id in assignments or free_capacity[restaurant_id] <= 0:
+            continue
+        assignments[order_id] = restaurant_id
+        free_capacity[restaurant_id] -= 1
+    return assignments
+
+
+def assign_orders():
+    """Назначить рестораны всем необработанным заказам без ресторана.
+
+    Каждый заказ получает одного из своих ресторанов-кандидатов: пары
+    назначаются жадно по возрастанию расстояния (см. match_orders), пока
+    число активных заказов ресторана не достигнет его capacity. Заказы, у всех кандидатов
+    которых нет мест, остаются без ресторана. Возвращает число назначенных заказов.
+    """
+    with transaction.atomic():
+        order_ids = list(
+            FoodCart.objects.select_for_update()
+            # У заказов со сброшенными кандидатами старые записи ещё не удалены,
+            # но рестораны в них могли перестать подходить.
+            .filter(status='Unprocessed', restaurant__isnull=True, candidates_updated_at__isnull=False)
+            .values_list('id', flat=True)
+            )
+        candidates = OrderRestaurantCandidate.objects.filter(
+            order_id__in=order_ids
+            ).values_list('order_id', 'restaurant_id', 'distance')
+
+        active_orders = Counter(dict(
+            FoodCart.objects.filter(status__in=ACTIVE_STATUSES, restaurant__isnull=False)
+            .values_list('restaurant')
+            .annotate(count=Count('id'))
+            ))
+        free_capacity = {
+            restaurant_id: capacity - active_orders[restaurant_id]
+            for restaurant_id, capacity in Restaurant.objects.values_list('id', 'capacity')
+            }
+
+        assignments = match_orders(candidates, free_capacity)
+        now = timezone.now()
+        FoodCart.objects.bulk_update(
+            [
+                FoodCart(id=order_id, restaurant_id=restaurant_id, updated_at=now)
+                for order_id, restaurant_id in assignments.items()
+            ],
+            ['restaurant', 'updated_at'],
+            batch_size=500
+            )
+        if assignments:
+            mark_orders_changed()
+    return len(assignments)
@@ -0,0 +1,65 @@
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import RestaurantMenuItem
+
+
+KEY_PREFIX = 'foodcartapp:availability:'
+
+
+def make_key(product_id):
+    return f'{KEY_PREFIX}{product_id}'
+
+
+def build_restaurants_masks(product_ids):
+    """Собрать из базы битовые маски ресторанов, где товары сейчас в продаже.
+
+    Бит с номером id ресторана выставлен, если ресторан готовит товар.
+    """
+    masks = dict.fromkeys(product_ids, 0)
+    menu_items = RestaurantMenuItem.objects.filter(
+        product_id__in=product_ids,
+        availability=True
+        ).values_list('product_id', 'restaurant_id')
+    for product_id, restaurant_id in menu_items:
+        masks[product_id] |= 1 << restaurant_id
+    return masks
+
+
+def get_restaurants_masks(product_ids):
+    """Вернуть {id товара: маска ресторанов}, беря маски из кэша, а недостающие — из базы."""
+    product_ids = set(product_ids)
+    cached_masks = cache.get_many([make_key(product_id) for product_id in product_ids])
+    masks = {
+        product_id: cached_masks[make_key(product_id)]
+        for product_id in product_ids if make_key(product_id) in cached_masks
+        }
+
+    missing_ids = product_ids - masks.keys()
+    if missing_ids:
+        missing_masks = build_restaurants_masks(missing_ids)
+        cache.set_many(
+            {make_key(product_id): mask for product_id, mask in missing_masks.items()},
+            settings.AVAILABILITY_CACHE_TIMEOUT
+            )
+        masks.update(missing_masks)
+    return masks
+
+
+def refresh_restaurants_masks(product_ids):
+    """Пересчитать маски товаров после изменения их пунктов меню."""
+    masks = build_restaurants_masks(set(product_ids))
+    cache.set_many(
+        {make_key(product_id): mask for product_id, mask in masks.items()},
+        settings.AVAILABILITY_CACHE_TIMEOUT
+        )
+
+
+def get_suitable_restaurants_mask(product_ids, masks):
+    """Маска ресторанов, где в продаже сразу все товары заказа."""
+    if not product_ids:
+        return 0
+    return reduce(and_, (masks[product_id] for product_id in product_ids))
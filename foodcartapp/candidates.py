@@ -0,0 +1,127 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from places.coordinates import link_places
+from places.distances import rank_destinations
+from places.tasks import run_in_background
+
+from .availability import get_restaurants_masks, get_suitable_restaurants_mask
+from .changes import mark_orders_changed
+from .locations import get_restaurants_index
+from .models import FoodCart, OrderRestaurantCandidate
+
+
+updating_order_ids = set()
+updating_lock = threading.Lock()
+
+
+def update_order_candidates(order_ids):
+    """Пересчитать и сохранить ближайшие рестораны для заказов.
+
+    Для каждого заказа в OrderRestaurantCandidate записываются до
+    NEAREST_RESTAURANTS_COUNT ближайших ресторанов, где в продаже все
+    его товары. Заказы, адрес которых геокодер сейчас не смог обработать,
+    остаются непосчитанными и пересчитаются, когда появятся координаты.
+    """
+    orders = list(
+        FoodCart.objects.filter(id__in=order_ids).select_related('place').prefetch_related('entries')
+        )
+    link_places(orders)
+    orders = [order for order in orders if not order.address or order.place]
+    if not orders:
+        return
+    coordinates = {
+        order.address: order.place.get_coordinates() for order in orders if order.place
+        }
+
+    masks = get_restaurants_masks(
+        entry.product_id for order in orders for entry in order.entries.all()
+        )
+    restaurants_index = get_restaurants_index()
+
+    located_orders = [order for order in orders if coordinates.get(order.address)]
+    shortlists = [
+        restaurants_index.nearest(
+            coordinates[order.address],
+            k=settings.NEAREST_RESTAURANTS_COUNT,
+            radius_km=settings.NEAREST_RESTAURANTS_RADIUS_KM,
+            restaurants_mask=get_suitable_restaurants_mask(
+                {entry.product_id for entry in order.entries.all()},
+                masks
+                )
+            )
+        for order in located_orders
+        ]
+    shortlisted_restaurants = [
+        {restaurant for restaurant, _ in shortlist} for shortlist in shortlists
+        ]
+    restaurants = list(set().union(*shortlisted_restaurants))
+    allowed = [
+        [restaurant in order_restaurants for restaurant in restaurants]
+        for order_restaurants in shortlisted_restaurants
+        ]
+    rankings = rank_destinations(
+        [coordinates[order.address] for order in located_orders],
+        [restaurants_index.coordinates[restaurant.id] for restaurant in restaurants],
+        allowed=allowed,
+        exact_ties=True
+        )
+
+    candidates = [
+        OrderRestaurantCandidate(
+            order=order,
+            restaurant=restaurants[index],
+            distance=distance_to_restaurant
+            )
+        for order, ranking in zip(located_orders, rankings)
+        for index, distance_to_restaurant in ranking
+        ]
+    with transaction.atomic():
+        OrderRestaurantCandidate.objects.filter(order__in=orders).delete()
+        OrderRestaurantCandidate.objects.bulk_create(candidates)
+        now = timezone.now()
+        FoodCart.objects.filter(id__in=[order.id for order in orders]).update(
+            candidates_updated_at=now,
+            updated_at=now
+            )
+        mark_orders_changed()
+
+
+def update_candidates_in_background(order_ids):
+    """Пересчитать кандидатов в фоне, не дублируя уже запущенные пересчёты."""
+    with updating_lock:
+        order_ids = set(order_ids) - updating_order_ids
+        updating_order_ids.update(order_ids)
+    if not order_ids:
+        return
+
+    def update():
+        try:
+            update_order_candidates(order_ids)
+        finally:
+            with updating_lock:
+                updating_order_ids.difference_update(order_ids)
+
+    run_in_background(update)
+
+
+def schedule_candidates_update(order_ids):
+    order_ids = list(order_ids)
+    transaction.on_commit(lambda: update_candidates_in_background(order_ids))
+
+
+def invalidate_candidates(orders):
+    """Сбросить кандидатов у незавершённых заказов и пересчитать их после коммита."""
+    orders = orders.filter(status='Unprocessed')
+    order_ids = list(orders.values_list('id', flat=True).distinct())
+    if not order_ids:
+        return
+    FoodCart.objects.filter(id__in=order_ids).update(
+        candidates_updated_at=None,
+        updated_at=timezone.now()
+        )
+    mark_orders_changed()
+    schedule_candidates_update(order_ids)
@@ -0,0 +1,153 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Banner, Product
+from .renderers import dumps
+from .renditions import get_srcset
+
+
+CATALOG_KEY = 'foodcartapp:catalog'
+BANNERS_KEY = 'foodcartapp:banners'
+
+
+def serialize_category(product):
+    if not product.category:
+        return None
+    return {
+        'id': product.category.id,
+        'name': product.category.name,
+    }
+
+
+def serialize_images(product):
+    if not product.renditions.get('items'):
+        return None
+    return {
+        'srcset': get_srcset(product.renditions, ['jpeg', 'png']),
+        'webp_srcset': get_srcset(product.renditions, ['webp']) or None,
+    }
+
+
+# Поле ответа -> (колонки для only(), функция сериализации).
+PRODUCT_FIELDS = {
+    'id': (['id'], lambda product: product.id),
+    'name': (['name'], lambda product: product.name),
+    'price': (['price'], lambda product: product.price),
+    'special_status': (['special_status'], lambda product: product.special_status),
+    'description': (['description'], lambda product: product.description),
+    'category': (['category__id', 'category__name'], serialize_category),
+    'image': (['image'], lambda product: product.image.url),
+    'images': (['renditions'], serialize_images),
+    'restaurant': (['id', 'name'], lambda product: {
+        'id': product.id,
+        'name': product.name,
+    }),
+}
+
+
+def get_product_columns(fields):
+    """Колонки, которые нужно загрузить из базы, чтобы отдать поля fields."""
+    return sorted({column for field in fields for column in PRODUCT_FIELDS[field][0]})
+
+
+def serialize_products(products, fields=PRODUCT_FIELDS):
+    serializers = [(field, PRODUCT_FIELDS[field][1]) for field in fields]
+    return [
+        {field: serialize(product) for field, serialize in serializers}
+        for product in products
+    ]
+
+
+def get_banners(now=None):
+    banners = Banner.objects.active(now)
+    return [
+        {
+            'title': banner.title,
+            'src': banner.image.url,
+            'text': banner.text,
+        }
+        for banner in banners
+    ]
+
+
+def get_next_banners_change(now):
+    """Ближайший момент, когда какой-то баннер начнёт или перестанет показываться."""
+    moments = [
+        moment
+        for moments in Banner.objects.filter(
+            Q(active_from__gt=now) | Q(active_until__gt=now)
+            ).values_list('active_from', 'active_until')
+        for moment in moments
+        if moment and moment > now
+        ]
+    return min(moments, default=None)
+
+
+def build_banners():
+    now = timezone.now()
+    body = dumps(get_banners(now))
+    return {
+        'body': body,
+        'etag': hashlib.md5(body).hexdigest(),
+        'last_modified': now.replace(microsecond=0),
+        'expires_at': get_next_banners_change(now),
+    }
+
+
+def get_cached_banners():
+    """Вернуть ответ со списком баннеров из кэша, при промахе собрав его из базы.
+
+    Изменения в админке сбрасывают запись сигналом, но до воркеров с
+    собственным кэшем в памяти сброс не дойдёт. Поэтому запись живёт не
+    дольше BANNERS_MAX_AGE и не дольше ближайшего начала или конца
+    показа какого-нибудь баннера.
+    """
+    banners = cache.get(BANNERS_KEY)
+    if banners is None:
+        banners = build_banners()
+        timeout = settings.BANNERS_MAX_AGE
+        if banners['expires_at']:
+            seconds_left = (banners['expires_at'] - timezone.now()).total_seconds()
+            timeout = max(min(timeout, seconds_left), 1)
+        cache.set(BANNERS_KEY, banners, timeout)
+    return banners
+
+
+def invalidate_banners():
+    transaction.on_commit(lambda: cache.delete(BANNERS_KEY))
+
+
+def get_available_products():
+    return Product.objects.select_related('category').available().order_by('id')
+
+
+def build_catalog():
+    """Собрать каталог товаров в продаже в готовый JSON-ответ с метаданными для кэширования."""
+    body = dumps(serialize_products(get_available_products()))
+    return {
+        'body': body,
+        'etag': hashlib.md5(body).hexdigest(),
+        'last_modified': timezone.now().replace(microsecond=0),
+    }
+
+
+def get_catalog():
+    """Вернуть каталог из кэша, а при промахе собрать его из базы и закэшировать.
+
+    Кэш живёт бессрочно: его сбрасывают сигналы при изменении товаров,
+    категорий и пунктов меню.
+    """
+    catalog = cache.get(CATALOG_KEY)
+    if catalog is None:
+        catalog = build_catalog()
+        cache.set(CATALOG_KEY, catalog, None)
+    return catalog
+
+
+def invalidate_catalog():
+    transaction.on_commit(lambda: cache.delete(CATALOG_KEY))
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+
+ORDERS_CHANGED_KEY = 'foodcartapp:orders:changed_at'
+
+
+def mark_orders_changed():
+    """Сообщить ожидающим клиентам, что заказы изменились, после коммита транзакции."""
+    transaction.on_commit(
+        lambda: cache.set(ORDERS_CHANGED_KEY, timezone.now(), None)
+        )
+
+
+def get_orders_changed_at():
+    """Момент последнего изменения заказов. Читает только кэш, без базы.
+
+    Если метки в кэше нет — кэш очистили или перезапустили, — ставим её
+    заново на текущий момент: для ожидающих клиентов это выглядит как
+    изменение, после которого они перечитают заказы.
+    """
+    changed_at = cache.get(ORDERS_CHANGED_KEY)
+    if changed_at is None:
+        cache.add(ORDERS_CHANGED_KEY, timezone.now(), None)
+        changed_at = cache.get(ORDERS_CHANGED_KEY)
+    return changed_at
+
+
+def orders_changed_since(moment):
+    """Могли ли заказы измениться после moment."""
+    return get_orders_changed_at() >= moment
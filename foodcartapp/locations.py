@@ -0,0 +1,87 @@
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from places.coordinates import link_places
+from places.spatial import GridIndex
+
+from .models import Restaurant
+
+
+INDEX_VERSION_KEY = 'foodcartapp:restaurants_index:version'
+
+
+class RestaurantsIndex:
+    """Пространственный индекс ресторанов с известными координатами."""
+
+    def __init__(self, version, restaurants):
+        """restaurants — рестораны с подгруженными записями place."""
+        self.version = version
+        self.restaurants = {
+            restaurant.id: restaurant for restaurant in restaurants
+            if restaurant.place and restaurant.place.get_coordinates()
+            }
+        self.coordinates = {
+            restaurant_id: restaurant.place.get_coordinates()
+            for restaurant_id, restaurant in self.restaurants.items()
+            }
+        self.grid = GridIndex(self.coordinates, cell_km=settings.RESTAURANTS_INDEX_CELL_KM)
+        self.complete = all(
+            restaurant.place_id for restaurant in restaurants if restaurant.address
+            )
+
+    def nearest(self, point, k=None, radius_km=None, restaurants_mask=None):
+        """Вернуть до k ближайших к point ресторанов не дальше radius_km.
+
+        restaurants_mask — битовая маска id ресторанов, которыми ограничен
+        поиск. Результат — список пар (ресторан, приблизительное расстояние в км).
+        """
+        predicate = None
+        if restaurants_mask is not None:
+            def predicate(restaurant_id):
+                return restaurants_mask >> restaurant_id & 1
+        return [
+            (self.restaurants[restaurant_id], distance_km)
+            for restaurant_id, distance_km
+            in self.grid.nearest(point, k=k, radius_km=radius_km, predicate=predicate)
+            ]
+
+
+restaurants_index = None
+restaurants_index_lock = threading.Lock()
+
+
+def get_index_version():
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(INDEX_VERSION_KEY)
+    return version
+
+
+def invalidate_restaurants_index():
+    """Попросить все воркеры перестроить индекс при следующем обращении."""
+    cache.set(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_restaurants_index():
+    """Вернуть актуальный индекс ресторанов, перестроив его при необходимости.
+
+    Индекс живёт в памяти воркера, а версия — в общем кэше, так что
+    изменение ресторана или его координат в одном воркере заставляет
+    перестроить индекс все остальные.
+    """
+    global restaurants_index
+
+    version = get_index_version()
+    with restaurants_index_lock:
+        index = restaurants_index
+        if index and index.version == version and index.complete:
+            return index
+
+        restaurants = list(Restaurant.objects.select_related('place'))
+        link_places(restaurants, timeout=settings.GEOCODER_REQUEST_BUDGET)
+        restaurants_index = RestaurantsIndex(version, restaurants)
+        return restaurants_index
@@ -0,0 +1,54 @@
+import gzip
+import json
+import timeit
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from foodcartapp.renderers import dumps
+
+
+def make_catalog(products_count):
+    return [
+        {
+            'id': number,
+            'name': f'Бургер №{number}',
+            'price': Decimal('349.90') + number,
+            'special_status': number % 7 == 0,
+            'description': 'Сочная говяжья котлета, сыр чеддер, маринованные огурцы и фирменный соус',
+            'category': {'id': number % 5, 'name': 'Бургеры'},
+            'image': f'/media/burger_{number}.jpg',
+            'restaurant': {'id': number, 'name': f'Бургер №{number}'},
+        }
+        for number in range(products_count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость и размер JSON-ответов API: прежний JsonResponse против рендерера на orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200, help='Сколько товаров в каталоге')
+        parser.add_argument('--repeat', type=int, default=200, help='Сколько раз кодировать каталог')
+
+    def handle(self, *args, **options):
+        catalog = make_catalog(options['products'])
+        encoders = {
+            'json, indent=4 (было)': lambda: json.dumps(
+                catalog, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4
+                ).encode('utf-8'),
+            'orjson, компактно': lambda: dumps(catalog),
+            'orjson, ?pretty': lambda: dumps(catalog, pretty=True),
+        }
+        self.stdout.write(
+            f'{"кодировщик":<24}{"мс на ответ":>14}{"байт":>10}{"байт gzip":>12}'
+            )
+        for name, encode in encoders.items():
+            seconds = timeit.timeit(encode, number=options['repeat'])
+            body = encode()
+            self.stdout.write(
+                f'{name:<24}{seconds / options["repeat"] * 1000:>14.3f}'
+                f'{len(body):>10}{len(gzip.compress(body)):>12}'
+                )
@@ -0,0 +1,24 @@
+from django.contrib.staticfiles import finders
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Banner
+
+
+class Command(BaseCommand):
+    help = 'Копирует в media картинки баннеров, которые пока есть только в статике'
+
+    def handle(self, *args, **options):
+        image_names = set(Banner.objects.exclude(image='').values_list('image', flat=True))
+        for image_name in sorted(image_names):
+            if default_storage.exists(image_name):
+                continue
+            static_path = finders.find(image_name)
+            if not static_path:
+                self.stderr.write(f'Картинка {image_name} не найдена ни в media, ни в статике')
+                continue
+            with open(static_path, 'rb') as image:
+                default_storage.save(image_name, File(image))
+            self.stdout.write(f'{image_name} скопирована в media')
+        self.stdout.write(self.style.SUCCESS('Картинки баннеров на месте'))
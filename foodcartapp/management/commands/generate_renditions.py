@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.catalog import invalidate_catalog
+from foodcartapp.models import Product
+from foodcartapp.renditions import update_renditions
+
+
+class Command(BaseCommand):
+    help = 'Нарезает уменьшенные копии и WebP-версии картинок товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перенарезать и те картинки, у которых копии уже есть'
+            )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').only('image', 'renditions')
+        updated = [
+            update_renditions(product, force=options['force']) for product in products.iterator()
+            ]
+        if any(updated):
+            invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS('Картинки товаров нарезаны'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.snapshots import publish_catalog
+
+
+class Command(BaseCommand):
+    help = 'Выкладывает сжатые снимки каталога для раздачи через nginx'
+
+    def handle(self, *args, **options):
+        manifest = publish_catalog()
+        if manifest is None:
+            self.stdout.write('CATALOG_SNAPSHOT_ROOT не задан, снимки не выкладываются')
+            return
+        for name, hashed_name in manifest.items():
+            self.stdout.write(f'{name} -> {hashed_name}')
+        self.stdout.write(self.style.SUCCESS('Снимки каталога выложены'))
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.1 on 2026-10-18 17:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0059_auto_20211126_1440'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodcart',
+            name='candidates_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Ближайшие рестораны рассчитаны'),
+        ),
+        migrations.CreateModel(
+            name='OrderRestaurantCandidate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.FloatField(verbose_name='расстояние, км')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='restaurant_candidates', to='foodcartapp.foodcart', verbose_name='заказ')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_candidates', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'ресторан-кандидат для заказа',
+                'verbose_name_plural': 'рестораны-кандидаты для заказов',
+                'ordering': ['order', 'distance'],
+                'unique_together': {('order', 'restaurant')},
+            },
+        ),
+    ]
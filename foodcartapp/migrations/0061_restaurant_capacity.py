@@ -0,0 +1,18 @@
+# Generated by Django 3.2.1 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_order_restaurant_candidates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='capacity',
+            field=models.PositiveIntegerField(default=10, help_text='Сколько активных заказов ресторан может готовить одновременно', verbose_name='одновременных заказов'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.1 on 2026-10-18 17:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0006_place_date_index'),
+        ('foodcartapp', '0061_restaurant_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodcart',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='places.place', verbose_name='координаты'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='restaurants', to='places.place', verbose_name='координаты'),
+        ),
+    ]
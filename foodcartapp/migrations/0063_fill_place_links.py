@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from places.addresses import normalize_address
+
+
+def link_places(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+    places = {}
+    for place_id, normalized_address, lat in Place.objects.values_list('id', 'normalized_address', 'lat'):
+        if normalized_address not in places or lat is not None:
+            places[normalized_address] = place_id
+
+    for model_name in ['FoodCart', 'Restaurant']:
+        model = apps.get_model('foodcartapp', model_name)
+        linked = []
+        for instance in model.objects.exclude(address='').only('id', 'address'):
+            instance.place_id = places.get(normalize_address(instance.address))
+            if instance.place_id:
+                linked.append(instance)
+        model.objects.bulk_update(linked, ['place'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0062_place_links'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_places, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.1 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0063_fill_place_links'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodcart',
+            index=models.Index(fields=['status', 'registrated_at', 'id'], name='foodcart_status_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodcart',
+            index=models.Index(fields=['status', 'payment_method', 'registrated_at', 'id'], name='foodcart_payment_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodcart',
+            index=models.Index(fields=['status', 'restaurant', 'registrated_at', 'id'], name='foodcart_restaurant_queue_idx'),
+        ),
+    ]
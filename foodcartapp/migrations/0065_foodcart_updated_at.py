@@ -0,0 +1,18 @@
+# Generated by Django 3.2.1 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0064_order_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodcart',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Заказ изменён'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 3.2.1 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+from foodcartapp.search import normalize_search_text
+
+
+TRIGRAM_INDEXES = {
+    'foodcart_search_trgm_idx': ('foodcartapp_foodcart', 'search_text'),
+    'product_search_trgm_idx': ('foodcartapp_product', 'search_name'),
+    'productcategory_search_trgm_idx': ('foodcartapp_productcategory', 'search_name'),
+}
+
+
+def fill_search_columns(apps, schema_editor):
+    ProductCategory = apps.get_model('foodcartapp', 'ProductCategory')
+    Product = apps.get_model('foodcartapp', 'Product')
+    FoodCart = apps.get_model('foodcartapp', 'FoodCart')
+
+    categories = list(ProductCategory.objects.only('name'))
+    for category in categories:
+        category.search_name = normalize_search_text(category.name)
+    ProductCategory.objects.bulk_update(categories, ['search_name'], batch_size=500)
+
+    products = list(Product.objects.only('name'))
+    for product in products:
+        product.search_name = normalize_search_text(product.name)
+    Product.objects.bulk_update(products, ['search_name'], batch_size=500)
+
+    orders = list(FoodCart.objects.only('firstname', 'lastname', 'phonenumber', 'address'))
+    for order in orders:
+        order.search_text = normalize_search_text(
+            order.firstname, order.lastname, order.phonenumber, order.address
+            )
+    FoodCart.objects.bulk_update(orders, ['search_text'], batch_size=500)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Поиск идёт подстрокой (LIKE '%слово%'), обычный B-tree тут не помогает.
+    # В PostgreSQL такие запросы ускоряет триграммный GIN-индекс, в SQLite
+    # аналога нет — там поиск остаётся просмотром узкой колонки.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0065_foodcart_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodcart',
+            name='search_text',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='текст для поиска'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='название для поиска'),
+        ),
+        migrations.AddField(
+            model_name='productcategory',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='название для поиска'),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
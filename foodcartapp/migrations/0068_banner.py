@@ -0,0 +1,50 @@
+# Generated by Django 3.2.1 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+INITIAL_BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+def create_initial_banners(apps, schema_editor):
+    """Перенести в базу баннеры, которые раньше были зашиты в banners_list_api.
+
+    Сами картинки лежат в статике, в media их копирует команда copy_banner_images.
+    """
+    Banner = apps.get_model('foodcartapp', 'Banner')
+    Banner.objects.bulk_create(
+        Banner(title=title, image=image_name, text=text, order=order)
+        for order, (title, image_name, text) in enumerate(INITIAL_BANNERS)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0067_product_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=50, verbose_name='заголовок')),
+                ('image', models.ImageField(upload_to='', verbose_name='картинка')),
+                ('text', models.CharField(blank=True, max_length=200, verbose_name='текст')),
+                ('order', models.PositiveIntegerField(db_index=True, default=0, verbose_name='порядок')),
+                ('active_from', models.DateTimeField(blank=True, help_text='Если не указано, баннер показывается сразу', null=True, verbose_name='показывать с')),
+                ('active_until', models.DateTimeField(blank=True, help_text='Если не указано, баннер показывается бессрочно', null=True, verbose_name='показывать до')),
+            ],
+            options={
+                'verbose_name': 'баннер',
+                'verbose_name_plural': 'баннеры',
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.RunPython(create_initial_banners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from foodcartapp.search import get_phone_search_parts, normalize_search_text
+
+
+def fill_order_search_text(apps, schema_editor):
+    FoodCart = apps.get_model('foodcartapp', 'FoodCart')
+    orders = list(FoodCart.objects.only('firstname', 'lastname', 'phonenumber', 'address'))
+    for order in orders:
+        order.search_text = normalize_search_text(
+            order.firstname,
+            order.lastname,
+            *get_phone_search_parts(order.phonenumber),
+            order.address
+            )
+    FoodCart.objects.bulk_update(orders, ['search_text'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0068_banner'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_order_search_text, migrations.RunPython.noop),
+    ]
@@ -1,20 +1,39 @@
 from django.db import models
 from django.core.validators import MinValueValidator
-from django.db.models import F, Sum, DecimalField
+from django.db.models import F, OuterRef, Q, Subquery, Sum, DecimalField
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from django.utils import timezone
 
 from phonenumber_field.modelfields import PhoneNumberField
 
+from places.models import Place
+
+from .search import get_phone_search_parts, normalize_search_text
+
 
 class Restaurant(models.Model):
     name = models.CharField('название', max_length=50)
     address = models.CharField('адрес', max_length=100, blank=True)
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.SET_NULL,
+        related_name='restaurants',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='координаты'
+        )
     contact_phone = models.CharField(
         'контактный телефон', 
         max_length=50, 
         blank=True
         )
+    capacity = models.PositiveIntegerField(
+        'одновременных заказов',
+        default=10,
+        help_text='Сколько активных заказов ресторан может готовить одновременно'
+        )
 
     class Meta:
         verbose_name = 'ресторан'
@@ -31,6 +50,15 @@ class ProductQuerySet(models.QuerySet):
 
 class ProductCategory(models.Model):
     name = models.CharField('название', max_length=50)
+    # Поисковые колонки заполняются в save(). QuerySet.update() и bulk_update()
+    # его не вызывают: после массовой правки исходных полей заполните колонку
+    # тем же normalize_search_text, иначе поиск будет искать по старым значениям.
+    search_name = models.CharField(
+        'название для поиска',
+        max_length=100,
+        blank=True,
+        editable=False
+        )
 
     class Meta:
         verbose_name = 'категория'
@@ -39,6 +67,10 @@ class ProductCategory(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.name)
+        super().save(*args, **kwargs)
+
 
 class Product(models.Model):
     name = models.CharField('название', max_length=50)
@@ -63,6 +95,19 @@ class Product(models.Model):
         db_index=True
         )
     description = models.TextField('описание', max_length=200, blank=True)
+    renditions = models.JSONField(
+        'уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False
+        )
+    # Заполняется в save(), см. ProductCategory.search_name.
+    search_name = models.CharField(
+        'название для поиска',
+        max_length=100,
+        blank=True,
+        editable=False
+        )
 
     objects = ProductQuerySet.as_manager()
 
@@ -73,6 +118,64 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.name)
+        super().save(*args, **kwargs)
+
+    def get_image_url(self, min_width=0, min_height=0):
+        """URL самой маленькой копии картинки не меньше min_width × min_height в исходном формате или оригинала."""
+        suitable = [
+            rendition for rendition in self.renditions.get('items', [])
+            if rendition['format'] != 'webp' and
+            rendition['width'] >= min_width and
+            rendition.get('height', 0) >= min_height
+            ]
+        if not suitable:
+            return self.image.url
+        return default_storage.url(min(suitable, key=lambda rendition: rendition['width'])['name'])
+
+
+class BannerQuerySet(models.QuerySet):
+    def active(self, now=None):
+        now = now or timezone.now()
+        return self.filter(
+            Q(active_from__isnull=True) | Q(active_from__lte=now),
+            Q(active_until__isnull=True) | Q(active_until__gt=now)
+            )
+
+
+class Banner(models.Model):
+    title = models.CharField('заголовок', max_length=50)
+    image = models.ImageField('картинка')
+    text = models.CharField('текст', max_length=200, blank=True)
+    order = models.PositiveIntegerField('порядок', default=0, db_index=True)
+    active_from = models.DateTimeField(
+        'показывать с',
+        blank=True,
+        null=True,
+        help_text='Если не указано, баннер показывается сразу'
+        )
+    active_until = models.DateTimeField(
+        'показывать до',
+        blank=True,
+        null=True,
+        help_text='Если не указано, баннер показывается бессрочно'
+        )
+
+    objects = BannerQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return self.title
+
+    def clean(self):
+        if self.active_from and self.active_until and self.active_until <= self.active_from:
+            raise ValidationError({'active_until': 'Баннер должен заканчиваться позже, чем начинается'})
+
 
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
@@ -110,7 +213,12 @@ class FoodCartQuerySet(models.QuerySet):
         return price
 
     def get_original_price(self):
-        price = self.annotate(price=Sum(F('entries__price') * F('entries__quantity'), output_field=DecimalField()))
+        # Подзапрос, а не JOIN с GROUP BY: так база считает сумму только для
+        # строк, попавших в LIMIT, и может брать порядок заказов из индекса.
+        order_prices = Entry.objects.filter(order=OuterRef('pk')).values('order').annotate(
+            total=Sum(F('price') * F('quantity'), output_field=DecimalField())
+            ).values('total')
+        price = self.annotate(price=Subquery(order_prices, output_field=DecimalField()))
         return price
 
 
@@ -122,6 +230,15 @@ class FoodCart(models.Model):
     firstname = models.CharField('Имя', max_length=20)
     lastname = models.CharField('Фамилия', max_length=30)
     address = models.CharField('адрес', max_length=100, blank=True)
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.SET_NULL,
+        related_name='orders',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='координаты'
+        )
     phonenumber = PhoneNumberField(
         'Нормализованный номер владельца', 
         max_length=20, 
@@ -168,16 +285,57 @@ class FoodCart(models.Model):
         null=True,
         db_index=True
         )
+    updated_at = models.DateTimeField(
+        'Заказ изменён',
+        auto_now=True,
+        db_index=True
+        )
+    candidates_updated_at = models.DateTimeField(
+        'Ближайшие рестораны рассчитаны',
+        blank=True,
+        null=True,
+        editable=False
+        )
+    # Заполняется в save(), см. ProductCategory.search_name.
+    search_text = models.CharField(
+        'текст для поиска',
+        max_length=300,
+        blank=True,
+        editable=False
+        )
     
     objects = FoodCartQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'заказ'
         verbose_name_plural = 'заказы'
+        indexes = [
+            models.Index(
+                fields=['status', 'registrated_at', 'id'],
+                name='foodcart_status_queue_idx'
+                ),
+            models.Index(
+                fields=['status', 'payment_method', 'registrated_at', 'id'],
+                name='foodcart_payment_queue_idx'
+                ),
+            models.Index(
+                fields=['status', 'restaurant', 'registrated_at', 'id'],
+                name='foodcart_restaurant_queue_idx'
+                ),
+        ]
 
     def __str__(self):
         return f'{self.address} {self.firstname} {self.lastname}'
 
+    def save(self, *args, **kwargs):
+        self.search_text = normalize_search_text(
+            self.firstname,
+            self.lastname,
+            *get_phone_search_parts(self.phonenumber),
+            self.address
+            )
+        super().save(*args, **kwargs)
+
 
 class Entry(models.Model):
     product = models.ForeignKey(
@@ -199,3 +357,30 @@ class Entry(models.Model):
 
     def __str__(self):
         return f'{self.product.name} x {self.quantity}'
+
+
+class OrderRestaurantCandidate(models.Model):
+    order = models.ForeignKey(
+        FoodCart,
+        related_name='restaurant_candidates',
+        on_delete=models.CASCADE,
+        verbose_name='заказ'
+        )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='order_candidates',
+        on_delete=models.CASCADE,
+        verbose_name='ресторан'
+        )
+    distance = models.FloatField('расстояние, км')
+
+    class Meta:
+        verbose_name = 'ресторан-кандидат для заказа'
+        verbose_name_plural = 'рестораны-кандидаты для заказов'
+        ordering = ['order', 'distance']
+        unique_together = [
+            ['order', 'restaurant']
+        ]
+
+    def __str__(self):
+        return f'{self.order_id} - {self.restaurant.name} ({self.distance:.1f} км)'
@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+import orjson
+
+from django.http import HttpResponse
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+def default(value):
+    # Цены отдаём строкой, как DjangoJSONEncoder: через float они потеряли бы точность.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Promise):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(data, pretty=False):
+    """Закодировать data в JSON-байты: компактно, а с pretty — с отступами в два пробела."""
+    option = orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=default, option=option)
+
+
+def wants_pretty(request):
+    """Клиент просит отформатированный JSON параметром ?pretty."""
+    return request.GET.get('pretty', '0') not in ('', '0', 'false')
+
+
+class FastJsonResponse(HttpResponse):
+    """Аналог JsonResponse на orjson: компактный вывод, форматирование по запросу."""
+
+    def __init__(self, data, pretty=False, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data, pretty=pretty), **kwargs)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """Рендерер DRF на orjson. Отступы включаются ?pretty или Accept: application/json; indent=..."""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        request = renderer_context.get('request')
+        pretty = 'indent' in (accepted_media_type or '') or bool(request and wants_pretty(request))
+        return dumps(data, pretty=pretty)
@@ -0,0 +1,130 @@
+import hashlib
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = 'renditions'
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=settings.PRODUCT_IMAGE_QUALITY, optimize=True, progressive=True)
+    elif image_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=settings.PRODUCT_IMAGE_QUALITY, method=6)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def build_renditions(image_field):
+    """Нарезать картинку товара на ширины PRODUCT_IMAGE_WIDTHS в исходном формате и WebP.
+
+    Файлы называются по хэшу содержимого оригинала, поэтому их можно
+    кэшировать бессрочно: новая картинка получит новые имена. Картинку
+    не увеличиваем — ширины больше оригинальной пропускаются. Возвращает
+    словарь для поля Product.renditions: имя исходной картинки и список
+    {"width", "height", "format", "name"}.
+    """
+    image_field.open('rb')
+    try:
+        original = image_field.read()
+    finally:
+        image_field.close()
+    digest = hashlib.sha256(original).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(image_field.name))[0]
+
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+    # JPEG не умеет прозрачность, поэтому картинки с альфа-каналом остаются PNG.
+    image = image.convert('RGBA' if has_alpha(image) else 'RGB')
+    formats = ['PNG' if image.mode == 'RGBA' else 'JPEG']
+    if features.check('webp'):
+        formats.append('WEBP')
+    else:
+        logger.warning('Pillow собран без WebP, WebP-версии картинок не создаются')
+
+    renditions = []
+    for width in sorted(settings.PRODUCT_IMAGE_WIDTHS):
+        if width > image.width:
+            continue
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        for image_format in formats:
+            extension = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}[image_format]
+            name = f'{RENDITIONS_DIR}/{stem}.{digest}.{width}w.{extension}'
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(encode(resized, image_format)))
+            renditions.append({'width': width, 'height': height, 'format': image_format.lower(), 'name': name})
+    return {'source': image_field.name, 'items': renditions}
+
+
+def get_srcset(renditions, image_formats):
+    return ', '.join(
+        f'{default_storage.url(rendition["name"])} {rendition["width"]}w'
+        for rendition in renditions.get('items', []) if rendition['format'] in image_formats
+        )
+
+
+def is_outdated(renditions, image_name):
+    # Копии, нарезанные до появления поля height, тоже перенарезаем:
+    # без высоты по ним нельзя подобрать превью заданной высоты.
+    return (
+        renditions.get('source') != image_name or
+        any('height' not in item for item in renditions.get('items', []))
+        )
+
+
+def delete_unused_renditions(product, old_renditions):
+    """Удалить файлы прежних копий картинки товара, если на них не ссылается другой товар.
+
+    Одинаковые картинки с одинаковым именем дают одинаковые имена копий,
+    поэтому файлы могут быть общими у нескольких товаров.
+    """
+    current_names = {item['name'] for item in product.renditions.get('items', [])}
+    stale_names = {item['name'] for item in old_renditions.get('items', [])} - current_names
+    if not stale_names:
+        return
+    for renditions in type(product).objects.exclude(pk=product.pk).values_list('renditions', flat=True):
+        stale_names -= {item['name'] for item in renditions.get('items', [])}
+    for name in stale_names:
+        default_storage.delete(name)
+
+
+def update_renditions(product, force=False):
+    """Перенарезать картинку товара, если она сменилась.
+
+    Сохраняет поле без сигналов post_save и удаляет файлы прежних копий.
+    Возвращает True, если копии изменились.
+    """
+    if not product.image:
+        renditions = {}
+    elif not product.image.storage.exists(product.image.name):
+        # Файл картинки ещё не выложен или потерян — нарезать нечего.
+        return False
+    elif force or is_outdated(product.renditions, product.image.name):
+        try:
+            renditions = build_renditions(product.image)
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+            # Битые и слишком большие картинки показываем как есть, без копий.
+            logger.exception('Не удалось нарезать картинку %s', product.image.name)
+            return False
+    else:
+        return False
+    if renditions == product.renditions:
+        return False
+    old_renditions, product.renditions = product.renditions, renditions
+    type(product).objects.filter(pk=product.pk).update(renditions=renditions)
+    delete_unused_renditions(product, old_renditions)
+    return True
@@ -0,0 +1,49 @@
+import re
+
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def normalize_search_text(*parts):
+    """Привести текст к виду, в котором он хранится в поисковых колонках.
+
+    Регистр сворачивается в Python, а не в базе: SQLite не умеет менять
+    регистр кириллицы. «ё» не отличается от «е», знаки препинания
+    отбрасываются, слова разделяются одним пробелом.
+    """
+    text = ' '.join(str(part) for part in parts if part)
+    text = text.casefold().replace('ё', 'е')
+    return ' '.join(TOKEN_PATTERN.findall(text))
+
+
+def get_phone_search_parts(phonenumber):
+    """Номер телефона в международном и национальном виде одними цифрами.
+
+    Менеджер ищет заказ и по «+7 916 …», и по «8916…», поэтому в
+    поисковую колонку попадают оба варианта.
+    """
+    if not phonenumber:
+        return []
+    parts = [str(phonenumber)]
+    if getattr(phonenumber, 'is_valid', lambda: False)():
+        parts.append(''.join(char for char in phonenumber.as_national if char.isdigit()))
+    return parts
+
+
+def search_filter(query, *fields):
+    """Q-условие: каждое слово запроса встречается хотя бы в одной из поисковых колонок fields.
+
+    Возвращает None, если в запросе нет ни одного слова.
+    """
+    words = normalize_search_text(query).split()
+    if not words:
+        return None
+    return reduce(and_, (
+        reduce(or_, (Q(**{f'{field}__contains': word}) for field in fields))
+        for word in words
+        ))
@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.db.models import F, Q
+from django.dispatch import receiver
+
+from places.addresses import normalize_address
+from places.models import Place
+from places.signals import places_changed
+from places.tasks import run_in_background
+
+from .availability import refresh_restaurants_masks
+from .candidates import invalidate_candidates, schedule_candidates_update, updating_lock, updating_order_ids
+from .catalog import invalidate_banners, invalidate_catalog
+from .changes import mark_orders_changed
+from .locations import invalidate_restaurants_index
+from .models import Banner, Entry, FoodCart, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .renditions import update_renditions
+from .snapshots import publish_in_background
+
+
+def get_orders_served_by(restaurants):
+    return FoodCart.objects.filter(entries__product__menu_items__restaurant__in=restaurants)
+
+
+@receiver(post_save, sender=Restaurant)
+def restaurant_saved(sender, instance, created, **kwargs):
+    # Название ресторана выводится и в уже распределённых заказах.
+    mark_orders_changed()
+    location_changed = (
+        instance.address != instance.previous_address or
+        instance.place_id != instance.previous_place_id
+        )
+    if created or location_changed:
+        invalidate_restaurants_index()
+        invalidate_candidates(get_orders_served_by([instance]))
+
+
+@receiver(pre_delete, sender=Restaurant)
+def restaurant_deleted(sender, instance, **kwargs):
+    invalidate_restaurants_index()
+    invalidate_candidates(FoodCart.objects.filter(restaurant_candidates__restaurant=instance))
+
+
+@receiver(places_changed)
+def place_changed(sender, normalized_addresses, coordinates_changed=True, **kwargs):
+    if not coordinates_changed:
+        return
+    normalized_addresses = set(normalized_addresses)
+
+    def is_affected(instance):
+        return normalize_address(instance.address) in normalized_addresses
+
+    restaurants = [
+        restaurant for restaurant in Restaurant.objects.filter(
+            Q(place__normalized_address__in=normalized_addresses) | Q(place__isnull=True)
+            ).exclude(address='')
+        if is_affected(restaurant)
+        ]
+    if restaurants:
+        invalidate_restaurants_index()
+        invalidate_candidates(get_orders_served_by(restaurants))
+
+    # Заказы, которые сейчас пересчитываются, сами привяжутся к новым записям Place.
+    with updating_lock:
+        busy_order_ids = list(updating_order_ids)
+    unprocessed_orders = FoodCart.objects.filter(status='Unprocessed').exclude(id__in=busy_order_ids)
+    unlinked_order_ids = [
+        order.id for order in unprocessed_orders.filter(place__isnull=True).exclude(address='').only('id', 'address')
+        if is_affected(order)
+        ]
+    invalidate_candidates(
+        unprocessed_orders.filter(
+            Q(place__normalized_address__in=normalized_addresses) | Q(id__in=unlinked_order_ids)
+            )
+        )
+
+
+@receiver(pre_save, sender=RestaurantMenuItem)
+def remember_menu_item_product(sender, instance, **kwargs):
+    instance.previous_product_id = None
+    if instance.pk:
+        instance.previous_product_id = RestaurantMenuItem.objects.filter(
+            pk=instance.pk
+            ).values_list('product_id', flat=True).first()
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def menu_item_changed(sender, instance, **kwargs):
+    product_ids = {instance.product_id, getattr(instance, 'previous_product_id', None)}
+    product_ids.discard(None)
+
+    def refresh():
+        refresh_restaurants_masks(product_ids)
+        invalidate_candidates(FoodCart.objects.filter(entries__product_id__in=product_ids))
+
+    transaction.on_commit(refresh)
+
+
+def update_product_renditions(product_id):
+    product = Product.objects.filter(pk=product_id).only('image', 'renditions').first()
+    if product and update_renditions(product):
+        invalidate_catalog()
+        if settings.CATALOG_SNAPSHOT_ROOT:
+            publish_in_background()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    # Нарезка картинки занимает секунды, поэтому идёт в фоне и после коммита,
+    # а не внутри сохранения товара в админке.
+    transaction.on_commit(lambda: run_in_background(update_product_renditions, instance.pk))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+    if settings.CATALOG_SNAPSHOT_ROOT:
+        transaction.on_commit(publish_in_background)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def banner_changed(sender, **kwargs):
+    invalidate_banners()
+
+
+@receiver(pre_save, sender=FoodCart)
+@receiver(pre_save, sender=Restaurant)
+def link_address_place(sender, instance, **kwargs):
+    instance.previous_address, instance.previous_place_id = None, None
+    if instance.pk:
+        instance.previous_address, instance.previous_place_id = sender.objects.filter(
+            pk=instance.pk
+            ).values_list('address', 'place_id').first() or (None, None)
+    if instance.address != instance.previous_address:
+        instance.place = Place.objects.filter(
+            normalized_address=normalize_address(instance.address)
+            ).order_by(F('lat').desc(nulls_last=True)).first() if instance.address else None
+
+
+@receiver(post_save, sender=FoodCart)
+@receiver(post_delete, sender=FoodCart)
+def order_changed(sender, **kwargs):
+    mark_orders_changed()
+
+
+@receiver(post_save, sender=FoodCart)
+def order_saved(sender, instance, created, **kwargs):
+    if created:
+        schedule_candidates_update([instance.id])
+    elif instance.address != instance.previous_address:
+        invalidate_candidates(FoodCart.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def entry_changed(sender, instance, **kwargs):
+    invalidate_candidates(FoodCart.objects.filter(pk=instance.order_id))
@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import brotli
+
+from django.conf import settings
+
+from places.tasks import run_in_background
+
+from .catalog import get_available_products, serialize_products
+from .renderers import dumps
+
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_SUFFIXES = ['.gz', '.br']
+HASHED_NAME_PATTERN = re.compile(r'^(?P<payload>\w+)\.(?P<digest>[0-9a-f]{12})\.json$')
+
+publish_lock = threading.Lock()
+publish_state = {'running': False, 'requested': False}
+
+
+def build_payloads():
+    # Баннеров в снимках нет: у них есть периоды показа, которые статичный
+    # файл не соблюдёт, а /api/banners/ и так отдаётся из кэша без запросов к базе.
+    return {
+        'products': serialize_products(get_available_products()),
+    }
+
+
+def write_file(path, content):
+    """Записать файл атомарно, чтобы nginx никогда не отдал его наполовину записанным.
+
+    У каждой записи свой временный файл, так что одновременные выкладки
+    из разных воркеров и cron не пишут друг другу в один файл.
+    """
+    descriptor, temporary_path = tempfile.mkstemp(
+        dir=os.path.dirname(path),
+        prefix=f'.{os.path.basename(path)}.',
+        suffix='.tmp'
+        )
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+        # mkstemp создаёт файл только для владельца, а читать его будет nginx.
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def is_same_content(path, content):
+    # Не перезаписываем неизменившийся файл: иначе nginx сменит ETag и клиенты скачают его заново.
+    try:
+        with open(path, 'rb') as file:
+            return file.read() == content
+    except FileNotFoundError:
+        return False
+
+
+def publish_payload(root, payload_name, data):
+    """Записать компактный JSON и его gzip и brotli версии под хэшированным и постоянным именами.
+
+    Возвращает хэшированное имя JSON-файла.
+    """
+    body = dumps(data)
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    hashed_name = f'{payload_name}.{digest}.json'
+    variants = {
+        '': body,
+        '.gz': gzip.compress(body, compresslevel=9, mtime=0),
+        '.br': brotli.compress(body, quality=11),
+    }
+    for suffix, content in variants.items():
+        hashed_path = os.path.join(root, f'{hashed_name}{suffix}')
+        if os.path.exists(hashed_path):
+            os.utime(hashed_path)
+        else:
+            write_file(hashed_path, content)
+        stable_path = os.path.join(root, f'{payload_name}.json{suffix}')
+        if not is_same_content(stable_path, content):
+            write_file(stable_path, content)
+    return hashed_name
+
+
+def prune_snapshots(root, keep):
+    """Удалить старые хэшированные снимки, оставив keep последних для каждого ответа."""
+    snapshots = {}
+    for name in os.listdir(root):
+        match = HASHED_NAME_PATTERN.match(name)
+        if match:
+            snapshots.setdefault(match['payload'], []).append(name)
+
+    for names in snapshots.values():
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(root, name)), reverse=True)
+        for name in names[keep:]:
+            for suffix in ['', *COMPRESSED_SUFFIXES]:
+                try:
+                    os.remove(os.path.join(root, f'{name}{suffix}'))
+                except FileNotFoundError:
+                    pass
+
+
+def publish_catalog():
+    """Выложить снимки каталога в CATALOG_SNAPSHOT_ROOT.
+
+    Для каждого ответа пишутся файлы name.<хэш>.json — их можно отдавать
+    с бессрочным кэшированием — и name.json с последней версией. Рядом
+    лежат сжатые .gz и .br варианты для gzip_static и brotli_static в
+    nginx. manifest.json связывает постоянные имена с хэшированными.
+    Пустой CATALOG_SNAPSHOT_ROOT отключает выкладку — тогда функция
+    ничего не делает и возвращает None.
+    """
+    root = settings.CATALOG_SNAPSHOT_ROOT
+    if not root:
+        return None
+    os.makedirs(root, exist_ok=True)
+    manifest = {
+        f'{payload_name}.json': publish_payload(root, payload_name, data)
+        for payload_name, data in build_payloads().items()
+        }
+    manifest_path = os.path.join(root, 'manifest.json')
+    manifest_content = dumps(manifest, pretty=True)
+    if not is_same_content(manifest_path, manifest_content):
+        write_file(manifest_path, manifest_content)
+    prune_snapshots(root, settings.CATALOG_SNAPSHOT_KEEP)
+    return manifest
+
+
+def publish_in_background():
+    """Перевыложить снимки в фоне. Изменения, пришедшие во время выкладки, вызовут ещё одну."""
+    with publish_lock:
+        if publish_state['running']:
+            publish_state['requested'] = True
+            return
+        publish_state['running'] = True
+
+    def publish():
+        while True:
+            try:
+                publish_catalog()
+            except Exception:
+                # Любая ошибка, в том числе базы, не должна оставить флаг running
+                # навсегда: иначе воркер больше не выложит ни одного снимка.
+                logger.exception('Не удалось выложить снимки каталога')
+            with publish_lock:
+                if not publish_state['requested']:
+                    publish_state['running'] = False
+                    return
+                publish_state['requested'] = False
+
+    run_in_background(publish)
@@ -0,0 +1,466 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import brotli
+
+from PIL import Image, features
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from places.cache import places_cache
+from star_burger.testing import QueryBudgetMixin
+
+from .models import Banner, Entry, FoodCart, OrderRestaurantCandidate, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .assignment import assign_orders, match_orders
+from .catalog import get_catalog
+from .renderers import dumps
+from .snapshots import publish_catalog, publish_in_background, publish_state
+
+
+class RegisterOrderQueriesTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        places_cache.clear()
+        self.products = []
+
+    def add_products(self, count):
+        start = len(self.products)
+        self.products += [
+            Product.objects.create(name=f'Бургер {number}', price=100 + number, image='burger.jpg')
+            for number in range(start, start + count)
+            ]
+
+    def register_order(self):
+        response = self.client.post('/api/order/', {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тестовая улица, 1',
+            'products': [{'product': product.id, 'quantity': 2} for product in self.products],
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_register_order(self):
+        self.assertQueryBudget(6, self.add_products, self.register_order)
+        order = FoodCart.objects.get_original_price().latest('id')
+        self.assertEqual(order.entries.count(), len(self.products))
+
+    def test_unknown_product_is_rejected(self):
+        response = self.client.post('/api/order/', {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тестовая улица, 1',
+            'products': [{'product': 100500, 'quantity': 1}],
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('products', response.json())
+
+
+class AssignOrdersTest(TestCase):
+    def setUp(self):
+        self.near = Restaurant.objects.create(name='Ближний', capacity=1)
+        self.far = Restaurant.objects.create(name='Дальний', capacity=5)
+
+    def create_order(self, distances, **fields):
+        fields.setdefault('candidates_updated_at', timezone.now())
+        order = FoodCart.objects.create(
+            firstname='Иван',
+            lastname='Петров',
+            phonenumber='+79161234567',
+            **fields
+            )
+        for restaurant, distance in distances.items():
+            OrderRestaurantCandidate.objects.create(order=order, restaurant=restaurant, distance=distance)
+        return order
+
+    def test_match_orders_respects_capacity(self):
+        candidates = [(1, 10, 1.0), (1, 20, 3.0), (2, 10, 2.0), (2, 20, 4.0)]
+        self.assertEqual(match_orders(candidates, {10: 1, 20: 1}), {1: 10, 2: 20})
+        self.assertEqual(match_orders(candidates, {10: 0, 20: 1}), {1: 20})
+
+    def test_active_orders_take_capacity(self):
+        FoodCart.objects.create(
+            firstname='Анна',
+            lastname='Смирнова',
+            phonenumber='+79161234568',
+            status='In progress',
+            restaurant=self.near
+            )
+        order = self.create_order({self.near: 1, self.far: 5})
+
+        self.assertEqual(assign_orders(), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.restaurant, self.far)
+
+    def test_stale_candidates_are_skipped(self):
+        order = self.create_order({self.near: 1}, candidates_updated_at=None)
+
+        self.assertEqual(assign_orders(), 0)
+        order.refresh_from_db()
+        self.assertIsNone(order.restaurant)
+
+
+class RestaurantChangesTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name='Ресторан', address='Москва, Тверская, 1')
+        product = Product.objects.create(name='Чизбургер', price=100)
+        RestaurantMenuItem.objects.create(restaurant=self.restaurant, product=product)
+        self.order = FoodCart.objects.create(
+            firstname='Иван',
+            lastname='Петров',
+            phonenumber='+79161234567',
+            address='Москва, Арбат, 1'
+            )
+        Entry.objects.create(order=self.order, product=product, quantity=1, price=100)
+        FoodCart.objects.filter(pk=self.order.pk).update(candidates_updated_at=timezone.now())
+
+    def get_candidates_updated_at(self):
+        self.order.refresh_from_db()
+        return self.order.candidates_updated_at
+
+    def test_rename_keeps_candidates(self):
+        self.restaurant.name = 'Новое название'
+        self.restaurant.save()
+        self.assertIsNotNone(self.get_candidates_updated_at())
+
+    def test_address_change_invalidates_candidates(self):
+        self.restaurant.address = 'Москва, Тверская, 2'
+        self.restaurant.save()
+        self.assertIsNone(self.get_candidates_updated_at())
+
+
+@override_settings(CATALOG_SNAPSHOT_ROOT='')
+class CatalogTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Фоновые задачи сигналов выполняем сразу: поток с отдельным
+        # соединением упёрся бы в блокировку тестовой базы SQLite.
+        run_now = mock.patch('foodcartapp.signals.run_in_background', lambda func, *args: func(*args))
+        run_now.start()
+        self.addCleanup(run_now.stop)
+        cache.clear()
+        restaurant = Restaurant.objects.create(name='Ресторан')
+        self.product = Product.objects.create(name='Чизбургер', price=100, image='burger.jpg')
+        RestaurantMenuItem.objects.create(restaurant=restaurant, product=self.product)
+
+
+class ProductListTest(CatalogTestCase):
+    def test_catalog_is_cached(self):
+        self.client.get('/api/products/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.json()[0]['name'], 'Чизбургер')
+
+    def test_not_modified(self):
+        response = self.client.get('/api/products/')
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_change_invalidates_catalog(self):
+        etag = self.client.get('/api/products/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Гамбургер'
+            self.product.save()
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'Гамбургер')
+
+
+class PublishCatalogTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        snapshot_root = tempfile.TemporaryDirectory()
+        self.addCleanup(snapshot_root.cleanup)
+        self.snapshot_root = snapshot_root.name
+        settings_override = override_settings(CATALOG_SNAPSHOT_ROOT=self.snapshot_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def read_snapshot(self, name):
+        with open(os.path.join(self.snapshot_root, name), 'rb') as snapshot:
+            return snapshot.read()
+
+    def test_snapshots_are_compressed_and_hashed(self):
+        manifest = publish_catalog()
+
+        body = self.read_snapshot(manifest['products.json'])
+        self.assertEqual(json.loads(body)[0]['name'], 'Чизбургер')
+        self.assertEqual(self.read_snapshot('products.json'), body)
+        self.assertEqual(gzip.decompress(self.read_snapshot('products.json.gz')), body)
+        self.assertEqual(brotli.decompress(self.read_snapshot('products.json.br')), body)
+        self.assertNotIn(b'\n', body)
+
+    @override_settings(CATALOG_SNAPSHOT_KEEP=2)
+    def test_old_snapshots_are_pruned(self):
+        for price in [100, 200, 300]:
+            self.product.price = price
+            self.product.save()
+            manifest = publish_catalog()
+
+        products_snapshots = [
+            name for name in os.listdir(self.snapshot_root)
+            if name.startswith('products.') and name.endswith('.json') and name != 'products.json'
+            ]
+        self.assertEqual(len(products_snapshots), 2)
+        self.assertIn(manifest['products.json'], products_snapshots)
+
+    def test_empty_root_disables_publishing(self):
+        with override_settings(CATALOG_SNAPSHOT_ROOT=''):
+            self.assertIsNone(publish_catalog())
+            call_command('publish_catalog', stdout=io.StringIO())
+        self.assertEqual(os.listdir(self.snapshot_root), [])
+
+    def test_failed_background_publish_can_run_again(self):
+        run_now = mock.patch('foodcartapp.snapshots.run_in_background', lambda func, *args: func(*args))
+        failing_payloads = mock.patch(
+            'foodcartapp.snapshots.build_payloads',
+            side_effect=DatabaseError('database is gone')
+            )
+        with run_now, failing_payloads, self.assertLogs('foodcartapp.snapshots', 'ERROR'):
+            publish_in_background()
+        self.assertFalse(publish_state['running'])
+
+        with run_now:
+            publish_in_background()
+        self.assertTrue(os.path.exists(os.path.join(self.snapshot_root, 'products.json')))
+
+
+class RenderersTest(CatalogTestCase):
+    def test_decimal_is_rendered_exactly(self):
+        self.assertEqual(dumps({'price': Decimal('0.10')}), b'{"price":"0.10"}')
+
+    def test_compact_by_default(self):
+        response = self.client.get('/api/products/')
+        self.assertNotIn(b'\n', response.content)
+        self.assertEqual(response.json()[0]['price'], '100.00')
+
+    def test_pretty_on_request(self):
+        compact = self.client.get('/api/products/')
+        pretty = self.client.get('/api/products/', {'pretty': 1})
+        self.assertIn(b'\n  ', pretty.content)
+        self.assertEqual(pretty.json(), compact.json())
+        self.assertNotEqual(pretty['ETag'], compact['ETag'])
+
+
+class ProductsPageTest(QueryBudgetMixin, CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.restaurant = Restaurant.objects.create(name='Ещё ресторан')
+        self.category = ProductCategory.objects.create(name='Напитки')
+
+    def add_products(self, count):
+        for number in range(count):
+            product = Product.objects.create(
+                name=f'Лимонад {number}',
+                category=self.category,
+                price=50,
+                special_status=number % 2 == 0,
+                image='lemonade.jpg'
+                )
+            RestaurantMenuItem.objects.create(restaurant=self.restaurant, product=product)
+
+    def add_products_and_warm_catalog(self, count):
+        self.add_products(count)
+        cache.clear()
+        get_catalog()
+
+    def get_page(self, **params):
+        # ETag берётся из закэшированного каталога; прогреваем его, чтобы считать только запросы страницы.
+        get_catalog()
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_pages_cover_filtered_products(self):
+        self.add_products(5)
+        page = self.get_page(category=self.category.id, limit=2, fields='id,name')
+        names = [product['name'] for product in page['products']]
+        while page['next_after']:
+            page = self.get_page(
+                category=self.category.id, limit=2, fields='id,name', after=page['next_after']
+                )
+            names += [product['name'] for product in page['products']]
+
+        self.assertEqual(names, [f'Лимонад {number}' for number in range(5)])
+        self.assertEqual(set(page['products'][0]), {'id', 'name'})
+
+    def test_special_status_filter(self):
+        self.add_products(4)
+        page = self.get_page(category=self.category.id, special_status='true')
+        self.assertEqual(len(page['products']), 2)
+
+    def test_only_requested_columns_are_loaded(self):
+        self.add_products(2)
+        get_catalog()
+        with self.assertNumQueries(1) as context:
+            self.client.get('/api/products/', {'fields': 'name,price'})
+        self.assertNotIn('description', context.captured_queries[0]['sql'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/products/', {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json()['errors'])
+
+    def test_page_query_budget(self):
+        self.assertQueryBudget(
+            1,
+            self.add_products_and_warm_catalog,
+            lambda: self.client.get('/api/products/', {'fields': 'id,name,category,image', 'limit': 100})
+            )
+
+
+class SearchTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        category = ProductCategory.objects.create(name='Ёлочные Напитки')
+        restaurant = Restaurant.objects.first()
+        for name in ['Морс Клюквенный', 'Чизбургер Двойной']:
+            product = Product.objects.create(name=name, category=category, price=100, image='burger.jpg')
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+    def search(self, query):
+        response = self.client.get('/api/products/search/', {'q': query, 'fields': 'name'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [product['name'] for product in response.json()['products']]
+
+    def test_search_ignores_cyrillic_case_and_yo(self):
+        self.assertEqual(self.search('ЧИЗБУРГЕР'), ['Чизбургер', 'Чизбургер Двойной'])
+        self.assertEqual(self.search('морс КЛЮКВ'), ['Морс Клюквенный'])
+
+    def test_search_by_category(self):
+        self.assertEqual(self.search('елочные'), ['Морс Клюквенный', 'Чизбургер Двойной'])
+
+    def test_empty_query_is_rejected(self):
+        response = self.client.get('/api/products/search/', {'q': '!!!'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_orders_admin_search(self):
+        FoodCart.objects.create(
+            firstname='Пётр',
+            lastname='Иванов',
+            phonenumber='+79161234567',
+            address='Москва, ул. Тверская, 1'
+            )
+        admin = User.objects.create_superuser('admin')
+        self.client.force_login(admin)
+        response = self.client.get('/admin/foodcartapp/foodcart/', {'q': 'петр тверская'})
+        self.assertContains(response, 'Иванов')
+        for phone_query in ['+7 916 123-45-67', '89161234567', '916 123']:
+            response = self.client.get('/admin/foodcartapp/foodcart/', {'q': phone_query})
+            self.assertContains(response, 'Иванов')
+
+
+class RenditionsTest(CatalogTestCase):
+    def upload(self, size, color='orange'):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG')
+        self.product.image = SimpleUploadedFile('burger.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        self.product.refresh_from_db()
+
+    @override_settings(PRODUCT_IMAGE_WIDTHS=[160, 320, 640])
+    def test_renditions_are_generated_on_upload(self):
+        self.upload((500, 400))
+
+        items = self.product.renditions['items']
+        self.assertEqual({item['width'] for item in items}, {160, 320})
+        expected_formats = {'jpeg', 'webp'} if features.check('webp') else {'jpeg'}
+        self.assertEqual({item['format'] for item in items}, expected_formats)
+        for item in items:
+            with Image.open(os.path.join(settings.MEDIA_ROOT, item['name'])) as rendition:
+                self.assertEqual(rendition.width, item['width'])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.get_image_url(100), f'/media/{items[0]["name"]}')
+        self.assertEqual(self.product.get_image_url(400), self.product.image.url)
+        # 500×400: копия шириной 160 высотой 128, шириной 320 — 256.
+        tall_enough = next(item for item in items if item['width'] == 320 and item['format'] == 'jpeg')
+        self.assertEqual(tall_enough['height'], 256)
+        self.assertEqual(self.product.get_image_url(min_height=200), f'/media/{tall_enough["name"]}')
+
+    @override_settings(PRODUCT_IMAGE_WIDTHS=[160])
+    def test_old_renditions_are_deleted(self):
+        self.upload((500, 400))
+        old_name = self.product.renditions['items'][0]['name']
+        self.upload((500, 400), color='green')
+        self.assertNotEqual(self.product.renditions['items'][0]['name'], old_name)
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, old_name)))
+
+    def test_decompression_bomb_is_skipped(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100), self.assertLogs('foodcartapp.renditions', 'ERROR'):
+            self.upload((500, 400))
+        self.assertEqual(self.product.renditions, {})
+
+    def test_srcset_in_catalog(self):
+        self.upload((800, 800))
+        cache.clear()
+        images = self.client.get('/api/products/').json()[0]['images']
+        self.assertRegex(images['srcset'], r'^/media/renditions/burger\.[0-9a-f]{12}\.160w\.jpg 160w, ')
+
+
+class BannersTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        Banner.objects.all().delete()
+        cache.clear()
+        self.now = timezone.now()
+        Banner.objects.create(title='Второй', image='second.jpg', order=2)
+        Banner.objects.create(title='Первый', image='first.jpg', order=1)
+        Banner.objects.create(
+            title='Будущий',
+            image='future.jpg',
+            active_from=self.now + timedelta(minutes=1)
+            )
+        Banner.objects.create(
+            title='Прошедший',
+            image='past.jpg',
+            active_until=self.now - timedelta(minutes=1)
+            )
+
+    def test_only_active_banners_in_order(self):
+        response = self.client.get('/api/banners/')
+        self.assertEqual([banner['title'] for banner in response.json()], ['Первый', 'Второй'])
+        self.assertLessEqual(int(response['Cache-Control'].split('max-age=')[1]), 60)
+
+    def test_banners_are_cached(self):
+        self.client.get('/api/banners/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/banners/', HTTP_IF_NONE_MATCH=self.client.get('/api/banners/')['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('public', response['Cache-Control'])
+
+    @override_settings(BANNERS_MAX_AGE=30)
+    def test_cache_expires_without_window_changes(self):
+        Banner.objects.exclude(active_from=None).delete()
+        with mock.patch('foodcartapp.catalog.cache.set') as cache_set:
+            self.client.get('/api/banners/')
+        self.assertEqual(cache_set.call_args.args[2], 30)
+
+    def test_banner_change_invalidates_cache(self):
+        etag = self.client.get('/api/banners/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Banner.objects.create(title='Новый', image='new.jpg')
+        response = self.client.get('/api/banners/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Новый', [banner['title'] for banner in response.json()])
@@ -1,12 +1,13 @@
 from django.urls import path, include
 
-from .views import product_list_api, banners_list_api, register_order
+from .views import product_list_api, product_search_api, banners_list_api, register_order
 
 
 app_name = "foodcartapp"
 
 urlpatterns = [
     path('products/', product_list_api),
+    path('products/search/', product_search_api),
     path('banners/', banners_list_api),
     path('order/', register_order),
     path('api-auth', include('rest_framework.urls'))
@@ -1,68 +1,167 @@
-from django.http import JsonResponse
-from django.templatetags.static import static
-from rest_framework.decorators import api_view
+import hashlib
+
+import orjson
+
+from django import forms
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
 from django.db import transaction
 
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import IntegerField, ModelSerializer, ValidationError
 
+from .catalog import PRODUCT_FIELDS, get_cached_banners, get_catalog, get_product_columns, serialize_products
 from .models import Product
 from .models import FoodCart, Entry
+from .renderers import FastJSONRenderer, FastJsonResponse, dumps, wants_pretty
+from .search import normalize_search_text, search_filter
 
 
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    """Активные баннеры витрины из кэша с ETag и Cache-Control на BANNERS_MAX_AGE секунд.
+
+    max-age не заходит за ближайшее начало или конец показа какого-нибудь
+    баннера, чтобы браузеры и nginx не держали устаревший список.
+    """
+    banners = get_cached_banners()
+    pretty = wants_pretty(request)
+    body = banners['body']
+    if pretty:
+        body = dumps(orjson.loads(body), pretty=True)
+    etag = quote_etag(f'{banners["etag"]}-pretty' if pretty else banners['etag'])
+    last_modified = int(banners['last_modified'].timestamp())
+
+    max_age = settings.BANNERS_MAX_AGE
+    if banners['expires_at']:
+        seconds_left = (banners['expires_at'] - timezone.now()).total_seconds()
+        max_age = max(min(max_age, int(seconds_left)), 0)
+
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+class ProductsFilter(forms.Form):
+    category = forms.IntegerField(required=False)
+    special_status = forms.NullBooleanField(required=False)
+    after = forms.IntegerField(required=False, min_value=0)
+    limit = forms.IntegerField(required=False, min_value=1)
+    fields = forms.CharField(required=False)
+
+    def clean_limit(self):
+        limit = self.cleaned_data['limit'] or settings.PRODUCTS_PAGE_SIZE
+        return min(limit, settings.PRODUCTS_PAGE_MAX_SIZE)
+
+    def clean_fields(self):
+        fields = [field for field in self.cleaned_data['fields'].split(',') if field]
+        unknown_fields = [field for field in fields if field not in PRODUCT_FIELDS]
+        if unknown_fields:
+            raise forms.ValidationError(
+                f'Неизвестные поля: {", ".join(unknown_fields)}. '
+                f'Доступны: {", ".join(PRODUCT_FIELDS)}'
+                )
+        return fields or list(PRODUCT_FIELDS)
+
+
+class ProductsSearch(ProductsFilter):
+    q = forms.CharField()
+
+    def clean_q(self):
+        query = self.cleaned_data['q']
+        if not normalize_search_text(query):
+            raise forms.ValidationError('В запросе нет ни одного слова')
+        return query
+
+
+def is_products_query(request):
+    return any(param in request.GET for param in ProductsFilter.base_fields)
+
 
+def get_catalog_etag(request):
+    """ETag каталога; у выборок и форматированного вывода он свой, но тоже без запросов к базе."""
+    etag = get_catalog()['etag']
+    if not request.GET:
+        return etag
+    return hashlib.md5(f'{etag}|{request.GET.urlencode()}'.encode()).hexdigest()
 
+
+def get_catalog_last_modified(request):
+    return get_catalog()['last_modified']
+
+
+def get_products_page(filters):
+    """Страница товаров в продаже по возрастанию id. Из базы читаются только нужные колонки."""
+    fields = filters['fields']
+    products = Product.objects.available().only(*get_product_columns(fields))
+    if 'category' in fields:
+        products = products.select_related('category')
+    if filters['category'] is not None:
+        products = products.filter(category_id=filters['category'])
+    if filters['special_status'] is not None:
+        products = products.filter(special_status=filters['special_status'])
+    if filters['after'] is not None:
+        products = products.filter(id__gt=filters['after'])
+    if filters.get('q'):
+        products = products.filter(
+            search_filter(filters['q'], 'search_name', 'category__search_name')
+            )
+
+    limit = filters['limit']
+    products = list(products.order_by('id')[:limit + 1])
+    next_after = products[limit - 1].id if len(products) > limit else None
+    return {
+        'products': serialize_products(products[:limit], fields),
+        'next_after': next_after,
+    }
+
+
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=get_catalog_etag, last_modified_func=get_catalog_last_modified)
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            },
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    """Каталог товаров в продаже.
+
+    Без параметров отдаёт весь каталог списком из кэша — так его читает
+    витрина. С параметрами category, special_status, after, limit или
+    fields отдаёт страницу {"products": [...], "next_after": id или null}.
+    """
+    pretty = wants_pretty(request)
+    if is_products_query(request):
+        filters_form = ProductsFilter(request.GET)
+        if not filters_form.is_valid():
+            return FastJsonResponse({'errors': filters_form.errors}, pretty=pretty, status=400)
+        return FastJsonResponse(get_products_page(filters_form.cleaned_data), pretty=pretty)
+
+    body = get_catalog()['body']
+    if pretty:
+        body = dumps(orjson.loads(body), pretty=True)
+    return HttpResponse(body, content_type='application/json')
+
+
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=get_catalog_etag, last_modified_func=get_catalog_last_modified)
+def product_search_api(request):
+    """Поиск товаров в продаже по названию товара и категории без учёта регистра и «ё».
+
+    Принимает те же параметры, что и /api/products/, плюс обязательный q.
+    """
+    pretty = wants_pretty(request)
+    search_form = ProductsSearch(request.GET)
+    if not search_form.is_valid():
+        return FastJsonResponse({'errors': search_form.errors}, pretty=pretty, status=400)
+    return FastJsonResponse(get_products_page(search_form.cleaned_data), pretty=pretty)
 
 
 class EntrySerializer(ModelSerializer):
+    product = IntegerField()
+
     class Meta:
         model = Entry
         fields = ['product', 'quantity']
@@ -75,8 +174,17 @@ class FoodCartSerializer(ModelSerializer):
         model = FoodCart
         fields = ['id', 'firstname', 'lastname', 'phonenumber', 'address', 'products']
 
+    def validate_products(self, entries):
+        """Загрузить все товары заказа одним запросом вместо запроса на каждую позицию."""
+        products = Product.objects.in_bulk({entry['product'] for entry in entries})
+        unknown_ids = sorted({entry['product'] for entry in entries} - products.keys())
+        if unknown_ids:
+            raise ValidationError(f'Недопустимые первичные ключи товаров: {unknown_ids}')
+        return [{**entry, 'product': products[entry['product']]} for entry in entries]
+
 @transaction.atomic
 @api_view(['POST'])
+@renderer_classes([FastJSONRenderer])
 def register_order(request):
     serializer = FoodCartSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -88,12 +196,14 @@ def register_order(request):
         phonenumber=serializer.validated_data['phonenumber']
         )
     entries = serializer.validated_data['products']
-    for entry in entries:
-        Entry.objects.create(
+    Entry.objects.bulk_create([
+        Entry(
             order=order,
             product=entry['product'],
             quantity=entry['quantity'],
             price=entry['product'].price
             )
+        for entry in entries
+        ])
     frontend_serialized_order = FoodCartSerializer(order)
     return Response(frontend_serialized_order.data)
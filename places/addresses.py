@@ -0,0 +1,38 @@
+import re
+
+
+ABBREVIATIONS = {
+    'г': 'город',
+    'гор': 'город',
+    'ул': 'улица',
+    'пр': 'проспект',
+    'пр-т': 'проспект',
+    'просп': 'проспект',
+    'пр-кт': 'проспект',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'наб': 'набережная',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'ш': 'шоссе',
+    'мкр': 'микрорайон',
+    'д': 'дом',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+(?:-[^\W_]+)*')
+
+
+def normalize_address(address):
+    """Привести адрес к каноническому ключу для поиска в Place.
+
+    Регистр и «ё» не различаются, знаки препинания и лишние пробелы
+    отбрасываются, распространённые сокращения («ул.», «пр-т», «д.»)
+    раскрываются в полные слова. Так «Москва, ул. Тверская, д. 1» и
+    «москва  улица тверская дом 1» дают один и тот же ключ.
+    """
+    address = address.casefold().replace('ё', 'е')
+    tokens = TOKEN_PATTERN.findall(address)
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in tokens)
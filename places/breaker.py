@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Предохранитель для вызовов внешнего сервиса.
+
+    После failure_threshold неудач подряд предохранитель размыкается и
+    reset_timeout секунд сразу отвечает CircuitOpen, не трогая сервис.
+    Медленный вызов, дольше slow_call_threshold секунд, считается
+    неудачей, даже если вернул ответ. По истечении reset_timeout один
+    пробный вызов решает, замкнуться снова или остаться разомкнутым.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold, slow_call_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def call(self, func, *args, **kwargs):
+        self.before_call()
+        started_at = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+
+        if time.monotonic() - started_at > self.slow_call_threshold:
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def before_call(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpen(self.name)
+                self.state = self.HALF_OPEN
+            if self.probe_in_flight:
+                raise CircuitOpen(self.name)
+            self.probe_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logger.warning('Предохранитель %s разомкнут после %s неудач', self.name, self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'failures': self.failures,
+                'trips': self.trips,
+            }
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class PlacesCache:
+    """Двухуровневый кэш записей Place по нормализованному адресу.
+
+    Первый уровень — ограниченный LRU в памяти процесса, второй — общий
+    для всех воркеров Django-кэш. Запись в LRU живёт не дольше
+    local_timeout секунд, так что изменения, сделанные другим воркером,
+    доходят до этого процесса не позже чем через local_timeout.
+    """
+    key_prefix = 'places:place:'
+
+    def __init__(self, maxsize, local_timeout, shared_timeout):
+        self.maxsize = maxsize
+        self.local_timeout = local_timeout
+        self.shared_timeout = shared_timeout
+        self.places = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter(local_hits=0, shared_hits=0, misses=0)
+
+    def make_key(self, normalized_address):
+        digest = hashlib.md5(normalized_address.encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}{digest}'
+
+    def get_many(self, normalized_addresses):
+        """Вернуть словарь {нормализованный адрес: Place} для найденных в кэше адресов."""
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self.lock:
+            for normalized_address in normalized_addresses:
+                cached = self.places.get(normalized_address)
+                if cached and cached[0] > now:
+                    self.places.move_to_end(normalized_address)
+                    found[normalized_address] = cached[1]
+                else:
+                    missing.append(normalized_address)
+            self.stats['local_hits'] += len(found)
+
+        if not missing:
+            return found
+
+        keys = {self.make_key(address): address for address in missing}
+        shared_places = {
+            keys[key]: place for key, place in cache.get_many(keys).items()
+            }
+        self.set_local(shared_places)
+        found.update(shared_places)
+
+        with self.lock:
+            self.stats['shared_hits'] += len(shared_places)
+            self.stats['misses'] += len(missing) - len(shared_places)
+        return found
+
+    def set_many(self, places):
+        """Положить записи Place в оба уровня кэша. places — словарь {нормализованный адрес: Place}."""
+        if not places:
+            return
+        cache.set_many(
+            {self.make_key(address): place for address, place in places.items()},
+            self.shared_timeout
+            )
+        self.set_local(places)
+
+    def set_local(self, places):
+        expires_at = time.monotonic() + self.local_timeout
+        with self.lock:
+            for address, place in places.items():
+                self.places[address] = (expires_at, place)
+                self.places.move_to_end(address)
+            while len(self.places) > self.maxsize:
+                self.places.popitem(last=False)
+
+    def delete_many(self, normalized_addresses):
+        normalized_addresses = list(normalized_addresses)
+        with self.lock:
+            for address in normalized_addresses:
+                self.places.pop(address, None)
+        cache.delete_many([self.make_key(address) for address in normalized_addresses])
+
+    def clear(self):
+        """Очистить LRU этого процесса. Общий кэш чистится через django.core.cache."""
+        with self.lock:
+            self.places.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return {**self.stats, 'size': len(self.places)}
+
+
+places_cache = PlacesCache(
+    maxsize=settings.PLACES_CACHE_SIZE,
+    local_timeout=settings.PLACES_LOCAL_CACHE_TIMEOUT,
+    shared_timeout=settings.PLACES_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,179 @@
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+from .addresses import normalize_address
+from .cache import places_cache
+from .geocoder import fetch_many_coordinates
+from .models import Place
+from .signals import places_changed
+from .tasks import run_in_background
+
+
+refreshing_place_ids = set()
+refreshing_lock = threading.Lock()
+
+
+def load_places(normalized_addresses):
+    """Прочитать записи Place из базы, предпочитая записи с координатами."""
+    found_places = {}
+    for place in Place.objects.filter(normalized_address__in=normalized_addresses):
+        known_place = found_places.get(place.normalized_address)
+        if not known_place or not known_place.get_coordinates():
+            found_places[place.normalized_address] = place
+    return found_places
+
+
+def get_places(addresses, max_workers=None, timeout=None):
+    """Вернуть записи Place для всех адресов разом.
+
+    Адреса сравниваются по нормализованному ключу, поэтому разные
+    написания одного адреса делят одну запись Place и один запрос к
+    геокодеру. Недостающие адреса геокодируются параллельно и
+    сохраняются одним bulk insert. Известные адреса сначала ищутся в
+    кэше и только потом в базе. Устаревшие записи отдаются как есть,
+    а обновляются в фоне. Возвращает словарь {адрес: Place}.
+
+    Если геокодер не уложился в timeout секунд или недоступен, ненайденные
+    адреса в словарь не попадают и догеокодируются в фоне.
+    """
+    addresses_by_key = {}
+    for address in addresses:
+        if address:
+            addresses_by_key.setdefault(normalize_address(address), []).append(address)
+
+    saved_places = places_cache.get_many(addresses_by_key)
+    not_cached = addresses_by_key.keys() - saved_places.keys()
+    if not_cached:
+        found_places = load_places(not_cached)
+        places_cache.set_many(found_places)
+        saved_places.update(found_places)
+
+    now = timezone.now()
+    refresh_in_background(
+        place for place in saved_places.values() if place.is_expired(now)
+        )
+
+    missing_addresses = {
+        key: key_addresses[0]
+        for key, key_addresses in addresses_by_key.items()
+        if key not in saved_places
+        }
+    fetched_coordinates = fetch_many_coordinates(
+        missing_addresses.values(),
+        max_workers=max_workers or settings.GEOCODER_MAX_WORKERS,
+        timeout=timeout
+        )
+
+    new_places = []
+    pending_addresses = []
+    for key, address in missing_addresses.items():
+        if address not in fetched_coordinates:
+            pending_addresses.append(address)
+            continue
+        lon, lat = fetched_coordinates[address] or (None, None)
+        new_places.append(
+            Place(address=address, normalized_address=key, lon=lon, lat=lat, date=now)
+            )
+    if new_places:
+        Place.objects.bulk_create(new_places, ignore_conflicts=True)
+        created_places = load_places(place.normalized_address for place in new_places)
+        # Сигнал сбрасывает кэш по этим адресам, поэтому кэшируем уже после него.
+        places_changed.send(
+            sender=Place,
+            normalized_addresses=[place.normalized_address for place in new_places],
+            coordinates_changed=True
+            )
+        places_cache.set_many(created_places)
+        saved_places.update(created_places)
+    if pending_addresses and timeout is not None:
+        run_in_background(get_places, pending_addresses)
+
+    return {
+        address: saved_places[key]
+        for key, key_addresses in addresses_by_key.items()
+        if key in saved_places
+        for address in key_addresses
+        }
+
+
+def get_coordinates(addresses, max_workers=None, timeout=None):
+    """Как get_places, но вернуть словарь {адрес: (lon, lat) или None}."""
+    places = get_places(addresses, max_workers=max_workers, timeout=timeout)
+    return {address: place.get_coordinates() for address, place in places.items()}
+
+
+def link_places(instances, timeout=None):
+    """Проставить place объектам с полями address и place, у которых его ещё нет.
+
+    instances — объекты одной модели. Недостающие записи Place ищутся и
+    геокодируются через get_places, связи сохраняются одним bulk_update.
+    Устаревшие координаты уже привязанных записей обновляются в фоне.
+    Возвращает объекты, у которых place теперь есть.
+    """
+    instances = [instance for instance in instances if instance.address]
+    unlinked = [instance for instance in instances if instance.place_id is None]
+    if unlinked:
+        places = get_places(
+            [instance.address for instance in unlinked],
+            timeout=timeout
+            )
+        linked = []
+        for instance in unlinked:
+            if instance.address in places:
+                instance.place = places[instance.address]
+                linked.append(instance)
+        if linked:
+            type(linked[0]).objects.bulk_update(linked, ['place'])
+
+    now = timezone.now()
+    linked = [instance for instance in instances if instance.place_id is not None]
+    refresh_in_background(
+        {instance.place for instance in linked if instance.place.is_expired(now)}
+        )
+    return linked
+
+
+def refresh_places(places):
+    """Заново геокодировать записи Place и сохранить результат одним запросом."""
+    places = list(places)
+    fetched_coordinates = fetch_many_coordinates(
+        {place.address for place in places},
+        max_workers=settings.GEOCODER_MAX_WORKERS
+        )
+    now = timezone.now()
+    places = [place for place in places if place.address in fetched_coordinates]
+    changed_places = {False: [], True: []}
+    for place in places:
+        coordinates = fetched_coordinates[place.address] or (None, None)
+        changed_places[coordinates != (place.lon, place.lat)].append(place)
+        place.lon, place.lat = coordinates
+        place.date = now
+    Place.objects.bulk_update(places, ['lon', 'lat', 'date'])
+    for coordinates_changed, same_kind_places in changed_places.items():
+        if same_kind_places:
+            places_changed.send(
+                sender=Place,
+                normalized_addresses=[place.normalized_address for place in same_kind_places],
+                coordinates_changed=coordinates_changed
+                )
+    return places
+
+
+def refresh_in_background(places):
+    """Поставить устаревшие записи в фоновое обновление, не дублируя уже запущенные."""
+    with refreshing_lock:
+        places = [place for place in places if place.id not in refreshing_place_ids]
+        refreshing_place_ids.update(place.id for place in places)
+    if not places:
+        return
+
+    def refresh():
+        try:
+            refresh_places(places)
+        finally:
+            with refreshing_lock:
+                refreshing_place_ids.difference_update(place.id for place in places)
+
+    run_in_background(refresh)
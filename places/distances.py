@@ -0,0 +1,86 @@
+import numpy as np
+
+from geopy import distance
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_radians(coordinates):
+    """Превратить последовательность пар (lon, lat) в массивы долгот и широт в радианах."""
+    points = np.radians(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+    return points[:, 0], points[:, 1]
+
+
+def haversine_matrix(origins, destinations):
+    """Матрица расстояний в км между всеми origins и destinations за один проход.
+
+    Точки задаются парами (lon, lat), как их хранит Place. Строки матрицы
+    соответствуют origins, столбцы — destinations.
+    """
+    origin_lons, origin_lats = to_radians(origins)
+    destination_lons, destination_lats = to_radians(destinations)
+
+    lat_deltas = destination_lats[np.newaxis, :] - origin_lats[:, np.newaxis]
+    lon_deltas = destination_lons[np.newaxis, :] - origin_lons[:, np.newaxis]
+    a = (
+        np.sin(lat_deltas / 2) ** 2 +
+        np.cos(origin_lats)[:, np.newaxis] * np.cos(destination_lats)[np.newaxis, :] *
+        np.sin(lon_deltas / 2) ** 2
+        )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def geodesic_km(origin, destination):
+    origin_lon, origin_lat = origin
+    destination_lon, destination_lat = destination
+    return distance.distance(
+        (origin_lat, origin_lon),
+        (destination_lat, destination_lon)
+        ).km
+
+
+def rank_destinations(origins, destinations, allowed=None, exact_ties=False, tie_tolerance=0.005):
+    """Для каждой точки origins вернуть destinations по возрастанию расстояния.
+
+    allowed — необязательная булева матрица той же формы, что и матрица
+    расстояний: False исключает пару из ранжирования. Результат — список
+    по одному на origin, каждый из пар (индекс destination, расстояние в км).
+
+    Гаверсинус ошибается на доли процента, поэтому в режиме exact_ties
+    соседние в рейтинге расстояния, различающиеся меньше чем на
+    tie_tolerance, пересчитываются по геодезической и переупорядочиваются.
+    """
+    if not len(origins):
+        return []
+    if not len(destinations):
+        return [[] for _ in origins]
+
+    distances = haversine_matrix(origins, destinations)
+    if allowed is not None:
+        distances = np.where(allowed, distances, np.inf)
+    order = np.argsort(distances, axis=1, kind='stable')
+    sorted_distances = np.take_along_axis(distances, order, axis=1)
+
+    rankings = []
+    for row, (row_order, row_distances) in enumerate(zip(order, sorted_distances)):
+        finite = np.isfinite(row_distances)
+        ranking = list(zip(row_order[finite].tolist(), row_distances[finite].tolist()))
+        if exact_ties and len(ranking) > 1:
+            ranking = resolve_ties(origins[row], destinations, ranking, tie_tolerance)
+        rankings.append(ranking)
+    return rankings
+
+
+def resolve_ties(origin, destinations, ranking, tie_tolerance):
+    ranked_distances = np.array([km for _, km in ranking])
+    close = np.diff(ranked_distances) <= tie_tolerance * ranked_distances[1:]
+    tied = np.zeros(len(ranking), dtype=bool)
+    tied[:-1] |= close
+    tied[1:] |= close
+
+    ranking = [
+        (index, geodesic_km(origin, destinations[index]) if is_tied else km)
+        for (index, km), is_tied in zip(ranking, tied)
+        ]
+    return sorted(ranking, key=lambda item: item[1])
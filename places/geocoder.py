@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import requests
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .breaker import CircuitBreaker, CircuitOpen
+
+
+logger = logging.getLogger(__name__)
+
+
+class GeocoderError(Exception):
+    """Геокодер ответил, но ответ не удалось разобрать."""
+
+
+class BaseGeocoder:
+    """Интерфейс бэкенда геокодера.
+
+    Бэкенд выбирается настройкой GEOCODER_BACKEND и должен уметь
+    превращать адрес в пару (lon, lat) или None, если адрес не найден.
+    """
+
+    def fetch_coordinates(self, address):
+        raise NotImplementedError
+
+
+class YandexGeocoder(BaseGeocoder):
+    base_url = "https://geocode-maps.yandex.ru/1.x"
+
+    def __init__(self):
+        self.apikey = settings.YA_GEO_APIKEY
+        self.timeout = (
+            settings.GEOCODER_CONNECT_TIMEOUT,
+            settings.GEOCODER_READ_TIMEOUT
+            )
+
+        retries = Retry(
+            total=settings.GEOCODER_RETRIES,
+            backoff_factor=settings.GEOCODER_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            )
+        adapter = HTTPAdapter(
+            pool_maxsize=settings.GEOCODER_MAX_WORKERS,
+            max_retries=retries
+            )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+
+    def fetch_coordinates(self, address):
+        params = {"geocode": address, "apikey": self.apikey, "format": "json"}
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        try:
+            found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+            if not found_places:
+                return None
+
+            most_relevant = found_places[0]
+            lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
+            return float(lon), float(lat)
+        except (ValueError, KeyError, IndexError, TypeError) as error:
+            raise GeocoderError(f'Непонятный ответ геокодера на {address!r}') from error
+
+
+class FakeGeocoder(BaseGeocoder):
+    """Офлайн-геокодер для разработки и нагрузочного тестирования.
+
+    Берёт координаты из JSON-файла GEOCODER_FIXTURE вида
+    {"адрес": [lon, lat]}, а для остальных адресов выдаёт стабильные
+    координаты в пределах Москвы, вычисленные по хэшу адреса.
+    """
+    center = (37.62, 55.75)
+    spread = 0.2
+
+    def __init__(self):
+        self.known_places = {}
+        if settings.GEOCODER_FIXTURE:
+            with open(settings.GEOCODER_FIXTURE, encoding='utf-8') as fixture:
+                self.known_places = {
+                    address: tuple(coordinates) if coordinates else None
+                    for address, coordinates in json.load(fixture).items()
+                    }
+
+    def fetch_coordinates(self, address):
+        if address in self.known_places:
+            return self.known_places[address]
+
+        digest = hashlib.md5(address.encode('utf-8')).digest()
+        lon_shift = int.from_bytes(digest[:4], 'big') / 2 ** 32 - 0.5
+        lat_shift = int.from_bytes(digest[4:8], 'big') / 2 ** 32 - 0.5
+        center_lon, center_lat = self.center
+        return (
+            round(center_lon + lon_shift * self.spread, 6),
+            round(center_lat + lat_shift * self.spread, 6)
+            )
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    geocoder_class = import_string(settings.GEOCODER_BACKEND)
+    return geocoder_class()
+
+
+geocoder_breaker = CircuitBreaker(
+    'geocoder',
+    failure_threshold=settings.GEOCODER_BREAKER_FAILURES,
+    slow_call_threshold=settings.GEOCODER_BREAKER_SLOW_CALL,
+    reset_timeout=settings.GEOCODER_BREAKER_RESET_TIMEOUT,
+    )
+
+
+def fetch_coordinates(address):
+    return geocoder_breaker.call(get_geocoder().fetch_coordinates, address)
+
+
+def fetch_many_coordinates(addresses, max_workers=10, timeout=None):
+    """Геокодировать адреса параллельно, не больше max_workers запросов одновременно.
+
+    Возвращает словарь {адрес: (lon, lat) или None}. Адреса, которые не
+    успели геокодироваться за timeout секунд или на которых геокодер
+    ответил ошибкой или непонятным ответом, в словарь не попадают.
+    """
+    addresses = list(addresses)
+    if not addresses:
+        return {}
+
+    workers = min(max_workers, len(addresses))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        executor.submit(fetch_coordinates, address): address for address in addresses
+        }
+    done, _ = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    found_coordinates = {}
+    for future in done:
+        address = futures[future]
+        try:
+            found_coordinates[address] = future.result()
+        except (requests.RequestException, GeocoderError, CircuitOpen) as error:
+            logger.warning('Не удалось геокодировать %s: %r', address, error)
+    return found_coordinates
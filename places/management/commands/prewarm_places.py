@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import FoodCart, Restaurant
+from places.addresses import normalize_address
+from places.coordinates import get_coordinates
+from places.models import Place
+
+
+class Command(BaseCommand):
+    help = (
+        'Геокодирует адреса ресторанов и незавершённых заказов, которых ещё нет в базе. '
+        'Сохраняет результат пачками, поэтому прерванный запуск можно просто повторить'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Сколько адресов геокодировать одновременно')
+        parser.add_argument('--rate', type=float, default=10,
+                            help='Не больше указанного числа запросов к геокодеру в секунду')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--all-orders', action='store_true',
+                            help='Геокодировать адреса всех заказов, а не только незавершённых')
+
+    def handle(self, *args, **options):
+        orders = FoodCart.objects.all()
+        if not options['all_orders']:
+            orders = orders.exclude(status='Recieved')
+        addresses = set(Restaurant.objects.values_list('address', flat=True))
+        addresses.update(orders.values_list('address', flat=True))
+
+        addresses_by_key = {}
+        for address in addresses:
+            if address:
+                addresses_by_key.setdefault(normalize_address(address), address)
+        saved_keys = set(
+            Place.objects.filter(normalized_address__in=addresses_by_key)
+            .values_list('normalized_address', flat=True)
+            )
+        missing_addresses = [
+            address for key, address in addresses_by_key.items() if key not in saved_keys
+            ]
+
+        total = len(missing_addresses)
+        self.stdout.write(f'Адресов без координат: {total}')
+        batch_size = options['batch_size']
+        for start in range(0, total, batch_size):
+            batch = missing_addresses[start:start + batch_size]
+            started_at = time.monotonic()
+            get_coordinates(batch, max_workers=options['concurrency'])
+            self.stdout.write(f'Геокодировано {start + len(batch)} из {total}')
+
+            min_duration = len(batch) / options['rate']
+            elapsed = time.monotonic() - started_at
+            if elapsed < min_duration:
+                time.sleep(min_duration - elapsed)
+
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from places.coordinates import refresh_places
+from places.models import Place
+
+
+class Command(BaseCommand):
+    help = 'Заново геокодирует устаревшие адреса. Удобно запускать по cron в часы затишья'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Обновить не больше указанного числа адресов')
+        parser.add_argument('--pause', type=float, default=1,
+                            help='Пауза между пачками в секундах')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        limit = options['limit']
+        processed = 0
+        refreshed = 0
+        places = Place.objects.expired().order_by('date', 'id')
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            batch = list(places[:size])
+            if not batch:
+                break
+            # Адреса, которые не удалось обновить, остаются устаревшими —
+            # курсор по (date, id) не даёт взять их снова в этом запуске.
+            last_place = batch[-1]
+            places = places.filter(
+                Q(date__gt=last_place.date) | Q(date=last_place.date, id__gt=last_place.id)
+                )
+            processed += len(batch)
+            batch_refreshed = len(refresh_places(batch))
+            refreshed += batch_refreshed
+            self.stdout.write(f'Обновлено адресов: {refreshed} из {processed}')
+            if not batch_refreshed:
+                self.stderr.write('Геокодер не ответил ни на один адрес пачки, попробуйте позже')
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Готово, обновлено адресов: {refreshed}'))
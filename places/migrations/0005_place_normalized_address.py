@@ -0,0 +1,28 @@
+# Generated by Django 3.2.1 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+from places.addresses import normalize_address
+
+
+def fill_normalized_address(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+    for place in Place.objects.all():
+        place.normalized_address = normalize_address(place.address)
+        place.save(update_fields=['normalized_address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0004_auto_20211201_1803'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='normalized_address',
+            field=models.CharField(blank=True, db_index=True, max_length=200, verbose_name='нормализованный адрес'),
+        ),
+        migrations.RunPython(fill_normalized_address, migrations.RunPython.noop),
+    ]
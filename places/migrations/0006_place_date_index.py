@@ -0,0 +1,18 @@
+# Generated by Django 3.2.1 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0005_place_normalized_address'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='place',
+            name='date',
+            field=models.DateTimeField(db_index=True, verbose_name='Дата запроса к геокодеру'),
+        ),
+    ]
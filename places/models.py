@@ -1,7 +1,47 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from .addresses import normalize_address
+
+
+class PlaceQuerySet(models.QuerySet):
+    def expired(self, now=None):
+        now = now or timezone.now()
+        return self.filter(
+            Q(lon__isnull=False, lat__isnull=False, date__lt=now - settings.PLACE_TTL) |
+            (Q(lon__isnull=True) | Q(lat__isnull=True)) & Q(date__lt=now - settings.PLACE_NEGATIVE_TTL)
+            )
+
 
 class Place(models.Model):
     address = models.CharField('адрес', max_length=100, unique=True)
+    normalized_address = models.CharField(
+        'нормализованный адрес',
+        max_length=200,
+        db_index=True,
+        blank=True
+        )
     lon = models.FloatField(verbose_name="Долгота", blank=True, null=True)
     lat = models.FloatField(verbose_name="Широта", blank=True, null=True)
-    date = models.DateTimeField("Дата запроса к геокодеру")
+    date = models.DateTimeField("Дата запроса к геокодеру", db_index=True)
+
+    objects = PlaceQuerySet.as_manager()
+
+    def __str__(self):
+        return self.address
+
+    def save(self, *args, **kwargs):
+        self.normalized_address = normalize_address(self.address)
+        super().save(*args, **kwargs)
+
+    def get_coordinates(self):
+        if self.lon is None or self.lat is None:
+            return None
+        return self.lon, self.lat
+
+    def is_expired(self, now=None):
+        now = now or timezone.now()
+        ttl = settings.PLACE_TTL if self.get_coordinates() else settings.PLACE_NEGATIVE_TTL
+        return self.date < now - ttl
@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .cache import places_cache
+from .models import Place
+
+
+# Отправляется при любом изменении записей Place, в том числе массовом
+# (bulk_create, bulk_update), для которого Django post_save не шлёт.
+# Аргумент normalized_addresses — нормализованные адреса изменённых записей,
+# coordinates_changed — False, если у них обновилась только дата запроса
+# к геокодеру, а координаты остались прежними.
+places_changed = Signal()
+
+
+@receiver(pre_save, sender=Place)
+def remember_place_coordinates(sender, instance, **kwargs):
+    instance.previous_coordinates = None
+    if instance.pk:
+        instance.previous_coordinates = Place.objects.filter(
+            pk=instance.pk
+            ).values_list('lon', 'lat').first()
+
+
+@receiver(post_save, sender=Place)
+def notify_place_saved(sender, instance, created, **kwargs):
+    previous_coordinates = getattr(instance, 'previous_coordinates', None)
+    places_changed.send(
+        sender=Place,
+        normalized_addresses=[instance.normalized_address],
+        coordinates_changed=created or previous_coordinates != (instance.lon, instance.lat)
+        )
+
+
+@receiver(post_delete, sender=Place)
+def notify_place_deleted(sender, instance, **kwargs):
+    places_changed.send(
+        sender=Place,
+        normalized_addresses=[instance.normalized_address],
+        coordinates_changed=True
+        )
+
+
+@receiver(places_changed)
+def invalidate_places_cache(sender, normalized_addresses, **kwargs):
+    places_cache.delete_many(normalized_addresses)
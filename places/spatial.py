@@ -0,0 +1,116 @@
+import heapq
+import math
+
+from collections import defaultdict
+
+from .distances import EARTH_RADIUS_KM
+
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GridIndex:
+    """Пространственный индекс точек на равномерной сетке.
+
+    Координаты (lon, lat) проецируются на плоскость в километрах
+    (равнопромежуточная проекция вокруг средней широты точек — для
+    масштабов города погрешность пренебрежимо мала) и раскладываются по
+    квадратным ячейкам со стороной cell_km. Поиск ближайших обходит ячейки
+    кольцами от ячейки запроса и останавливается, как только следующее
+    кольцо заведомо дальше найденных точек или радиуса поиска.
+    """
+
+    def __init__(self, points, cell_km=2):
+        """points — словарь {ключ: (lon, lat)}."""
+        self.cell_km = cell_km
+        self.points = dict(points)
+        latitudes = [lat for _, lat in self.points.values()]
+        mean_lat = sum(latitudes) / len(latitudes) if latitudes else 0
+        self.lon_scale = KM_PER_DEGREE * math.cos(math.radians(mean_lat))
+
+        self.cells = defaultdict(list)
+        for key, point in self.points.items():
+            x, y = self.project(point)
+            self.cells[self.get_cell(x, y)].append((key, x, y))
+
+        if self.cells:
+            cell_xs = [cell_x for cell_x, _ in self.cells]
+            cell_ys = [cell_y for _, cell_y in self.cells]
+            self.bounds = (min(cell_xs), max(cell_xs), min(cell_ys), max(cell_ys))
+
+    def __len__(self):
+        return len(self.points)
+
+    def project(self, point):
+        lon, lat = point
+        return lon * self.lon_scale, lat * KM_PER_DEGREE
+
+    def get_cell(self, x, y):
+        return math.floor(x / self.cell_km), math.floor(y / self.cell_km)
+
+    def iter_ring(self, center_x, center_y, ring):
+        if ring == 0:
+            yield center_x, center_y
+            return
+        for dx in range(-ring, ring + 1):
+            yield center_x + dx, center_y - ring
+            yield center_x + dx, center_y + ring
+        for dy in range(-ring + 1, ring):
+            yield center_x - ring, center_y + dy
+            yield center_x + ring, center_y + dy
+
+    def max_ring(self, center_x, center_y):
+        min_x, max_x, min_y, max_y = self.bounds
+        return max(
+            abs(center_x - min_x), abs(center_x - max_x),
+            abs(center_y - min_y), abs(center_y - max_y)
+            )
+
+    def scan(self, cells, x, y, radius_km, predicate):
+        found = []
+        for cell_points in cells:
+            for key, point_x, point_y in cell_points:
+                if predicate and not predicate(key):
+                    continue
+                distance_km = math.hypot(point_x - x, point_y - y)
+                if radius_km is None or distance_km <= radius_km:
+                    found.append((distance_km, key))
+        return found
+
+    def nearest(self, point, k=None, radius_km=None, predicate=None):
+        """Вернуть до k ближайших к point ключей не дальше radius_km.
+
+        predicate — необязательная функция от ключа, отсекающая
+        неподходящие точки. Результат — список пар (ключ, расстояние в км
+        по проекции) по возрастанию расстояния.
+        """
+        if not self.cells or k == 0:
+            return []
+
+        x, y = self.project(point)
+        center_x, center_y = self.get_cell(x, y)
+        last_ring = self.max_ring(center_x, center_y)
+        if radius_km is not None:
+            last_ring = min(last_ring, math.ceil(radius_km / self.cell_km) + 1)
+
+        found = []
+        visited_cells = 0
+        for ring in range(last_ring + 1):
+            ring_cells = list(self.iter_ring(center_x, center_y, ring))
+            visited_cells += len(ring_cells)
+            if visited_cells > len(self.points) * 4:
+                # Точки далеко и разрежены: дешевле перебрать их все.
+                found = self.scan(self.cells.values(), x, y, radius_km, predicate)
+                break
+            found.extend(self.scan(
+                (self.cells.get(cell, ()) for cell in ring_cells),
+                x, y, radius_km, predicate
+                ))
+
+            # Все точки следующих колец не ближе ring * cell_km к запросу.
+            if k is not None and len(found) >= k:
+                if heapq.nsmallest(k, found)[-1][0] <= ring * self.cell_km:
+                    break
+
+        found = heapq.nsmallest(k, found) if k is not None else sorted(found)
+        return [(key, distance_km) for distance_km, key in found]
@@ -0,0 +1,31 @@
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.GEOCODER_BACKGROUND_WORKERS,
+    thread_name_prefix='geocoder'
+    )
+
+
+def run_in_background(func, *args):
+    """Выполнить func в фоновом потоке геокодера.
+
+    Ошибки только логируются, а соединение с БД, открытое потоком,
+    закрывается после выполнения.
+    """
+    def run():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Фоновая задача %s завершилась с ошибкой', func.__name__)
+        finally:
+            connection.close()
+
+    return executor.submit(run)
@@ -1,3 +1,107 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from star_burger.testing import QueryBudgetMixin
+
+from .cache import places_cache
+from .coordinates import get_places
+from .geocoder import YandexGeocoder, fetch_many_coordinates, geocoder_breaker, get_geocoder
+from .models import Place
+
+
+@override_settings(GEOCODER_BACKEND='places.geocoder.FakeGeocoder', GEOCODER_FIXTURE=None)
+class GetPlacesQueriesTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        places_cache.clear()
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        self.addresses = []
+
+    def add_addresses(self, count):
+        start = len(self.addresses)
+        self.addresses += [f'Москва, Тестовая улица, {number}' for number in range(start, start + count)]
+
+    def test_new_addresses_are_saved_in_constant_queries(self):
+        self.assertQueryBudget(
+            6,
+            self.add_addresses,
+            lambda: get_places(self.addresses)
+            )
+
+    def test_cached_addresses_need_no_queries(self):
+        self.add_addresses(25)
+        get_places(self.addresses)
+        with self.assertNumQueries(0):
+            places = get_places(self.addresses)
+        self.assertEqual(set(places), set(self.addresses))
+
+
+class PlaceExpiredTest(TestCase):
+    def test_queryset_and_instance_agree(self):
+        now = timezone.now()
+        date = now - settings.PLACE_NEGATIVE_TTL - timedelta(minutes=1)
+        Place.objects.create(address='Найденный', lon=37.6, lat=55.7, date=date)
+        Place.objects.create(address='Без широты', lon=37.6, date=date)
+        Place.objects.create(address='Не найденный', date=date)
+
+        expired = set(Place.objects.expired(now).values_list('address', flat=True))
+        self.assertEqual(
+            expired,
+            {place.address for place in Place.objects.all() if place.is_expired(now)}
+            )
+        self.assertEqual(expired, {'Без широты', 'Не найденный'})
+
+
+class MalformedGeocoderResponseTest(TestCase):
+    def test_malformed_response_is_a_failed_lookup(self):
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+        geocoder = YandexGeocoder()
+        response = mock.Mock()
+        response.json.return_value = {'response': {}}
+        geocoder.session.get = mock.Mock(return_value=response)
+        failures = geocoder_breaker.failures
+
+        with mock.patch('places.geocoder.get_geocoder', return_value=geocoder):
+            found_coordinates = fetch_many_coordinates(['Москва, Тверская, 1'])
+
+        self.assertEqual(found_coordinates, {})
+        self.assertEqual(geocoder_breaker.failures, failures + 1)
+        geocoder_breaker.record_success()
+
+
+class RefreshPlacesCommandTest(TestCase):
+    def setUp(self):
+        date = timezone.now() - settings.PLACE_TTL - timedelta(days=1)
+        for number in range(3):
+            Place.objects.create(address=f'Адрес {number}', lon=37.6, lat=55.7, date=date)
+
+    def refresh(self, refresh_places, **options):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch('places.management.commands.refresh_places.refresh_places', refresh_places):
+            call_command('refresh_places', pause=0, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr
+
+    def test_failed_geocoder_stops_the_command(self):
+        output, _ = self.refresh(mock.Mock(return_value=[]), batch_size=1)
+        self.assertIn('Готово, обновлено адресов: 0', output)
+
+    def test_failed_places_are_not_fetched_again(self):
+        batches = []
+
+        def refresh_first_only(places):
+            batches.append([place.address for place in places])
+            return places[:1]
+
+        output, _ = self.refresh(refresh_first_only, batch_size=2)
+        self.assertEqual(batches, [['Адрес 0', 'Адрес 1'], ['Адрес 2']])
+        self.assertIn('Готово, обновлено адресов: 2', output)
@@ -1,3 +1,176 @@
-from django.test import TestCase
+from urllib.parse import quote
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from foodcartapp.models import (
+    Entry, FoodCart, OrderRestaurantCandidate, Product, ProductCategory, Restaurant, RestaurantMenuItem
+    )
+from places.cache import places_cache
+from star_burger.testing import QueryBudgetMixin
+
+
+class ManagerViewsQueriesTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        places_cache.clear()
+        manager = User.objects.create_user('manager', is_staff=True)
+        self.client.force_login(manager)
+        self.category = ProductCategory.objects.create(name='Бургеры')
+        self.restaurants = [
+            Restaurant.objects.create(name=f'Ресторан {number}') for number in range(2)
+            ]
+        self.product = Product.objects.create(name='Чизбургер', price=100, image='burger.jpg')
+        self.products_count = 0
+
+    def add_products(self, count):
+        products = [
+            Product.objects.create(
+                name=f'Бургер {self.products_count + number}',
+                category=self.category,
+                price=100,
+                image='burger.jpg'
+                )
+            for number in range(count)
+            ]
+        self.products_count += count
+        RestaurantMenuItem.objects.bulk_create(
+            RestaurantMenuItem(restaurant=restaurant, product=product)
+            for product in products
+            for restaurant in self.restaurants
+            )
+
+    def add_orders(self, count):
+        now = timezone.now()
+        orders = [
+            FoodCart.objects.create(
+                firstname='Иван',
+                lastname='Петров',
+                phonenumber='+79161234567',
+                address='Москва, Тестовая улица, 1',
+                restaurant=self.restaurants[0],
+                candidates_updated_at=now
+                )
+            for _ in range(count)
+            ]
+        Entry.objects.bulk_create(
+            Entry(order=order, product=self.product, quantity=1, price=100) for order in orders
+            )
+        OrderRestaurantCandidate.objects.bulk_create(
+            OrderRestaurantCandidate(order=order, restaurant=restaurant, distance=1.5)
+            for order in orders
+            for restaurant in self.restaurants
+            )
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_view_products(self):
+        self.assertQueryBudget(
+            5,
+            self.add_products,
+            lambda: self.get(reverse('restaurateur:ProductsView'))
+            )
+
+    def test_view_orders(self):
+        self.assertQueryBudget(
+            5,
+            self.add_orders,
+            lambda: self.get(reverse('restaurateur:view_orders'))
+            )
+
+    def test_view_orders_changes(self):
+        since = timezone.now().isoformat()
+        self.assertQueryBudget(
+            6,
+            self.add_orders,
+            lambda: self.get(reverse('restaurateur:orders_changes'), since=since)
+            )
+
+    def test_view_orders_changes_with_naive_since(self):
+        since = timezone.localtime().replace(tzinfo=None).isoformat()
+        response = self.get(reverse('restaurateur:orders_changes'), since=since)
+        self.assertIn('since', response.json())
+
+    def test_orders_api(self):
+        self.assertQueryBudget(
+            5,
+            self.add_orders,
+            lambda: self.get(reverse('restaurateur:orders_api'))
+            )
+
+    def test_orders_api_not_modified(self):
+        self.add_orders(3)
+        url = reverse('restaurateur:orders_api')
+        response = self.get(url)
+        self.assertEqual(len(response.json()['orders']), 3)
+
+        # Только сессия и пользователь, сами заказы не читаются.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        self.assertNotEqual(self.get(url, status='')['ETag'], response['ETag'])
+
+
+@override_settings(ORDERS_PAGE_SIZE=1)
+class OrdersPagesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        manager = User.objects.create_user('manager', is_staff=True)
+        self.client.force_login(manager)
+        for status in ['Unprocessed', 'Recieved', 'Unprocessed']:
+            FoodCart.objects.create(
+                firstname='Иван',
+                lastname='Петров',
+                phonenumber='+79161234567',
+                status=status,
+                candidates_updated_at=timezone.now()
+                )
+
+    def test_page_is_read_in_index_order(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('План запроса проверяется только на SQLite')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('restaurateur:view_orders'))
+        orders_query = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "foodcartapp_foodcart"' in query['sql']
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {orders_query}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('foodcart_status_queue_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_default_status_is_kept_on_next_pages(self):
+        response = self.client.get(reverse('restaurateur:view_orders'))
+        self.assertIn('status=Unprocessed', response.context['next_page_query'])
+        self.assertIn('status=Unprocessed', response.context['first_page_query'])
+
+        response = self.client.get(f"{reverse('restaurateur:view_orders')}?{response.context['next_page_query']}")
+        self.assertEqual([order['status'] for order in response.context['order_items']], ['Не обработан'])
+        self.assertIsNone(response.context['next_page_query'])
+
+    def test_changes_skip_orders_from_earlier_pages(self):
+        since = timezone.now().isoformat()
+        first_page = self.client.get(reverse('restaurateur:view_orders'))
+        last_page = self.client.get(f"{reverse('restaurateur:view_orders')}?{first_page.context['next_page_query']}")
+        first_order, last_order = FoodCart.objects.filter(status='Unprocessed').order_by('id')
+        for order in [first_order, last_order]:
+            order.comment = 'Позвонить заранее'
+            order.save()
+
+        with self.settings(ORDERS_PAGE_SIZE=10):
+            response = self.client.get(
+                f"{reverse('restaurateur:orders_changes')}?{last_page.context['changes_query']}"
+                f"&since={quote(since)}"
+                )
+        self.assertEqual([row['id'] for row in response.json()['rows']], [last_order.id])
@@ -14,6 +14,13 @@ urlpatterns = [
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/changes/', views.view_orders_changes, name="orders_changes"),
+    path('orders/assign/', views.assign_restaurants, name="assign_restaurants"),
+
+    path('api/orders/', views.view_orders_api, name="orders_api"),
+
+    path('places/cache/', views.view_places_cache_stats, name="places_cache_stats"),
+    path('places/geocoder/', views.view_geocoder_stats, name="geocoder_stats"),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
@@ -1,24 +1,31 @@
-import requests
-import datetime
+import hashlib
+import time
 
-from collections import defaultdict
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
 
 from django import forms
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils import timezone
 from django.views import View
-from django.urls import reverse_lazy
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from django.urls import reverse, reverse_lazy
+from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 from django.conf import settings
-from django.db.models import Q
-from django.db.models import Prefetch
+from django.db.models import Prefetch, Q
 
-from foodcartapp.models import Product, Restaurant, FoodCart, RestaurantMenuItem, Entry
-from places.models import Place
-
-from geopy import distance
-from operator import itemgetter
+from foodcartapp.assignment import assign_orders
+from foodcartapp.candidates import update_candidates_in_background
+from foodcartapp.changes import get_orders_changed_at, orders_changed_since
+from foodcartapp.models import Product, Restaurant, FoodCart, OrderRestaurantCandidate
+from places.cache import places_cache
+from places.geocoder import geocoder_breaker
 
 
 class Login(forms.Form):
@@ -76,7 +83,7 @@ def is_manager(user):
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_products(request):
     restaurants = list(Restaurant.objects.order_by('name'))
-    products = list(Product.objects.prefetch_related('menu_items'))
+    products = list(Product.objects.select_related('category').prefetch_related('menu_items'))
 
     default_availability = {restaurant.id: False for restaurant in restaurants}
     products_with_restaurants = []
@@ -105,124 +112,295 @@ def view_restaurants(request):
     })
 
 
-def get_menuitem_availability():
-    restaurantsmenuitems = RestaurantMenuItem.objects.select_related(
-        'restaurant',
-        'product'
-        )    
-    menuitems_availability = defaultdict(list)
-    for item in restaurantsmenuitems:
-        menuitems_availability[item.product].append(item.restaurant)
-    return menuitems_availability
-
-
-def get_suitable_restaurant(menuitems, ordered_items):
-    restaurants = [menuitems[item] for item in ordered_items]
-    return set.intersection(*[set(restaurant) for restaurant in restaurants])
-
-
-def get_or_create_place(api_key, place, saved_places):
-    
-    if place.address not in saved_places.keys():
-        coordinates = fetch_coordinates(api_key, place.address)
-        if not coordinates:
-            lon = lat = None
-        else:
-            lon, lat = coordinates
-        Place.objects.create(
-            address=place.address,
-            lon=lon,
-            lat=lat,
-            date=datetime.datetime.now()
-        )
-        return coordinates
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_places_cache_stats(request):
+    return JsonResponse(places_cache.get_stats())
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_geocoder_stats(request):
+    return JsonResponse(geocoder_breaker.get_stats())
+
 
-    lon = saved_places[place.address]['lon']
-    lat = saved_places[place.address]['lat']
+class OrdersFilter(forms.Form):
+    status = forms.ChoiceField(
+        label='Статус',
+        choices=[('', 'Любой'), *FoodCart.choices],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    payment_method = forms.ChoiceField(
+        label='Способ оплаты',
+        choices=[('', 'Любой'), *FoodCart.payment_methods],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    restaurant = forms.ChoiceField(
+        label='Ресторан',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    after = forms.CharField(required=False, widget=forms.HiddenInput)
 
-    if not (lat or lon):
-        return None
-    return lon, lat
-    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['restaurant'].choices = [
+            ('', 'Любой'),
+            ('none', 'Не назначен'),
+            *Restaurant.objects.order_by('name').values_list('id', 'name'),
+        ]
 
-def fetch_coordinates(apikey, place):
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    params = {"geocode": place, "apikey": apikey, "format": "json"}
-    response = requests.get(base_url, params=params)
-    response.raise_for_status()
-    found_places = response.json()['response']['GeoObjectCollection']['featureMember']
-    
-    if not found_places:
-        return None
 
-    most_relevant = found_places[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
-    return lon, lat
+def encode_cursor(order):
+    cursor = f'{order.registrated_at.isoformat()}|{order.id}'
+    return urlsafe_b64encode(cursor.encode()).decode()
 
 
-@user_passes_test(is_manager, login_url='restaurateur:login')
-def view_orders(request):
+def decode_cursor(cursor):
+    registrated_at, order_id = urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(registrated_at), int(order_id)
+
 
-    orders = []
-    orders_addresses = FoodCart.objects.values_list('address')
-    restaurant_adresses = Restaurant.objects.values_list('address')
-    saved_places = list(Place.objects.filter(
-        Q(address__in=orders_addresses) | 
-        Q(address__in=restaurant_adresses)).values())
-    saved_places = {place['address']:place for place in saved_places}
-    menuitems = get_menuitem_availability()
-    unprocessed_orders = FoodCart.objects.filter(status='Unprocessed').get_original_price().prefetch_related(
-        Prefetch('entries', 
-        queryset=Entry.objects.select_related('product'))
+def filter_after_cursor(orders, cursor):
+    """Оставить заказы, которые в порядке (registrated_at, id) идут после cursor."""
+    try:
+        registrated_at, order_id = decode_cursor(cursor)
+    except ValueError:
+        return orders
+    return orders.filter(
+        Q(registrated_at__gt=registrated_at) |
+        Q(registrated_at=registrated_at, id__gt=order_id)
         )
-    for order in unprocessed_orders:
-        place_coordinates = get_or_create_place(
-            settings.YA_GEO_APIKEY,
-            order, 
-            saved_places
+
+
+def filter_orders(orders, filters):
+    if filters.get('status'):
+        orders = orders.filter(status=filters['status'])
+    if filters.get('payment_method'):
+        orders = orders.filter(payment_method=filters['payment_method'])
+    if filters.get('restaurant') == 'none':
+        orders = orders.filter(restaurant__isnull=True)
+    elif filters.get('restaurant'):
+        orders = orders.filter(restaurant_id=filters['restaurant'])
+    return orders
+
+
+def with_order_details(orders):
+    return orders.get_original_price().select_related('restaurant').prefetch_related(
+        Prefetch(
+            'restaurant_candidates',
+            queryset=OrderRestaurantCandidate.objects.select_related('restaurant')
             )
-        if place_coordinates:
-            products = order.entries.all()
-            ordered_products = [product.product for product in products]
-            order_restraurants = get_suitable_restaurant(
-                menuitems,
-                ordered_products
-                )
-            
-            restaurant_distances = []
-
-            for restaurant in order_restraurants:
-                restaurant_coordinates = get_or_create_place(
-                    settings.YA_GEO_APIKEY,
-                    restaurant,
-                    saved_places
-                    )
-                distance_to_restaurant = distance.distance(
-                    (restaurant_coordinates), 
-                    (place_coordinates)
-                    ).km
-                restaurant_distances.append([restaurant.name, round(distance_to_restaurant, 1)])
-            restaurant_distances = sorted(restaurant_distances, key=itemgetter(1))
-        else:
-            restaurant_distances = None
-
-        order = {
-            'id': order.id,
-            'price': order.price,
-            'firstname': order.firstname,
-            'lastname': order.lastname,
-            'phonenumber': order.phonenumber,
-            'address': order.address,
-            'status': order.get_status_display(),
-            'comment': order.comment,
-            'payment_method': order.get_payment_method_display(),
-            'restaurant': restaurant_distances
-            }
-        orders.append(order)
+        )
+
+
+def serialize_order(order):
+    coordinates_pending = order.candidates_updated_at is None
+    restaurant_distances = None
+    if not coordinates_pending:
+        restaurant_distances = [
+            [candidate.restaurant.name, round(candidate.distance, 1)]
+            for candidate in order.restaurant_candidates.all()
+            ]
+
+    return {
+        'id': order.id,
+        'price': order.price,
+        'firstname': order.firstname,
+        'lastname': order.lastname,
+        'phonenumber': order.phonenumber,
+        'address': order.address,
+        'status': order.get_status_display(),
+        'comment': order.comment,
+        'payment_method': order.get_payment_method_display(),
+        'restaurant': restaurant_distances,
+        'assigned_restaurant': order.restaurant,
+        'coordinates_pending': coordinates_pending,
+        }
+
+
+def serialize_orders(orders):
+    """Подготовить заказы к выводу и поставить в очередь пересчёт непосчитанных кандидатов."""
+    serialized_orders = [serialize_order(order) for order in orders]
+    update_candidates_in_background(
+        order['id'] for order in serialized_orders if order['coordinates_pending']
+        )
+    return serialized_orders
+
+
+def with_default_status(query):
+    """Копия параметров запроса, где статус по умолчанию — «Не обработан».
+
+    Пустой status= означает «любой статус», а отсутствующий ключ —
+    значение по умолчанию, в том числе на следующих страницах списка.
+    """
+    query = query.copy()
+    query.setdefault('status', 'Unprocessed')
+    return query
+
+
+def get_filters(query):
+    filters_form = OrdersFilter(with_default_status(query))
+    filters = filters_form.cleaned_data if filters_form.is_valid() else {'status': 'Unprocessed'}
+    return filters_form, filters
+
+
+def get_orders_page(filters, page_size):
+    """Вернуть страницу заказов по возрастанию (registrated_at, id) и курсор следующей.
+
+    Страница начинается сразу после заказа, закодированного в
+    filters['after'], поэтому её стоимость не зависит от того, сколько
+    заказов лежит до неё.
+    """
+    orders = filter_orders(FoodCart.objects.all(), filters)
+    if filters.get('after'):
+        orders = filter_after_cursor(orders, filters['after'])
+
+    orders = list(with_order_details(orders.order_by('registrated_at', 'id'))[:page_size + 1])
+    next_cursor = encode_cursor(orders[page_size - 1]) if len(orders) > page_size else None
+    return orders[:page_size], next_cursor
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_orders(request):
+    changes_since = timezone.now()
+    filters_form, filters = get_filters(request.GET)
+    page_orders, next_cursor = get_orders_page(filters, settings.ORDERS_PAGE_SIZE)
+
+    next_page_query = None
+    if next_cursor:
+        next_page_query = with_default_status(request.GET)
+        next_page_query['after'] = next_cursor
+        next_page_query = next_page_query.urlencode()
+    changes_query = with_default_status(request.GET)
+    first_page_query = with_default_status(request.GET)
+    first_page_query.pop('after', None)
 
     return render(
         request,
         template_name='order_items.html',
         context={
-            'order_items': orders}
+            'order_items': serialize_orders(page_orders),
+            'filters_form': filters_form,
+            'next_page_query': next_page_query,
+            'first_page_query': first_page_query.urlencode(),
+            'changes_query': changes_query.urlencode(),
+            'long_poll_timeout': settings.ORDERS_LONG_POLL_TIMEOUT,
+            'is_first_page': not filters.get('after'),
+            'changes_since': changes_since.isoformat(),
+            'next_url': request.get_full_path(),
+            }
+        )
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_orders_changes(request):
+    """Отдать заказы, изменившиеся после since, дождавшись изменений не дольше wait секунд.
+
+    Пока заказы не менялись, запрос проверяет только метку в кэше и не
+    обращается к базе, так что ожидающий менеджер почти ничего не стоит.
+    after — курсор, с которого начинается страница менеджера: заказы с
+    предыдущих страниц в rows не попадают, чтобы страница их не дописала.
+    """
+    try:
+        since = datetime.fromisoformat(request.GET['since'])
+        wait = min(float(request.GET.get('wait', 0)), settings.ORDERS_LONG_POLL_TIMEOUT)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Укажите since в формате ISO 8601'}, status=400)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    filters_query = request.GET.copy()
+    for param in ['since', 'wait', 'after']:
+        filters_query.pop(param, None)
+    _, filters = get_filters(filters_query)
+    page_cursor = request.GET.get('after')
+
+    deadline = time.monotonic() + wait
+    while not orders_changed_since(since) and time.monotonic() < deadline:
+        time.sleep(settings.ORDERS_POLL_INTERVAL)
+
+    now = timezone.now()
+    if not orders_changed_since(since):
+        return JsonResponse({'since': now.isoformat(), 'rows': [], 'removed': []})
+
+    # Перекрытие ловит заказы, чья транзакция закоммитилась чуть позже метки updated_at.
+    changed_orders = list(with_order_details(
+        FoodCart.objects.filter(updated_at__gte=since - settings.ORDERS_CHANGES_OVERLAP)
+        .order_by('updated_at', 'id')
+        )[:settings.ORDERS_PAGE_SIZE + 1])
+    if len(changed_orders) > settings.ORDERS_PAGE_SIZE:
+        return JsonResponse({'since': now.isoformat(), 'reload': True})
+
+    matching_orders = filter_orders(
+        FoodCart.objects.filter(id__in=[order.id for order in changed_orders]),
+        filters
         )
+    if page_cursor:
+        matching_orders = filter_after_cursor(matching_orders, page_cursor)
+    matching_ids = set(matching_orders.values_list('id', flat=True))
+
+    next_url = f"{reverse('restaurateur:view_orders')}?{filters_query.urlencode()}"
+    rows = [
+        {
+            'id': order['id'],
+            'html': render_to_string('order_row.html', {'item': order, 'next_url': next_url}),
+        }
+        for order in serialize_orders(
+            order for order in changed_orders if order.id in matching_ids
+            )
+        ]
+    return JsonResponse({
+        'since': now.isoformat(),
+        'rows': rows,
+        'removed': [order.id for order in changed_orders if order.id not in matching_ids],
+        })
+
+
+def dump_order(order):
+    """Превратить заказ из serialize_order в словарь для JSON."""
+    assigned_restaurant = order['assigned_restaurant']
+    return {
+        **order,
+        'phonenumber': str(order['phonenumber']),
+        'restaurant': [
+            {'name': name, 'distance': distance} for name, distance in order['restaurant']
+            ] if order['restaurant'] is not None else None,
+        'assigned_restaurant': {
+            'id': assigned_restaurant.id,
+            'name': assigned_restaurant.name,
+            } if assigned_restaurant else None,
+        }
+
+
+def get_orders_etag(request):
+    """ETag списка заказов: метка последнего изменения заказов плюс параметры запроса.
+
+    Метка меняется при любой записи заказа, пересчёте кандидатов (а он
+    следует за изменениями меню, ресторанов и координат) и распределении,
+    так что ETag считается без обращения к базе.
+    """
+    changed_at = get_orders_changed_at()
+    version = f'{changed_at.isoformat()}|{request.GET.urlencode()}'
+    return hashlib.sha1(version.encode()).hexdigest()
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_orders_etag)
+def view_orders_api(request):
+    filters_form, filters = get_filters(request.GET)
+    if not filters_form.is_valid():
+        return JsonResponse({'errors': filters_form.errors}, status=400)
+    page_orders, next_cursor = get_orders_page(filters, settings.ORDERS_PAGE_SIZE)
+    return JsonResponse({
+        'orders': [dump_order(order) for order in serialize_orders(page_orders)],
+        'next_cursor': next_cursor,
+        }, json_dumps_params={'ensure_ascii': False})
+
+
+@require_POST
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def assign_restaurants(request):
+    assigned = assign_orders()
+    messages.info(request, f'Назначено заказов: {assigned}')
+    return redirect('restaurateur:view_orders')
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Предупредить, если в проде кэш не общий для воркеров.
+
+    Через кэш воркеры сообщают друг другу об изменениях: версии индекса
+    ресторанов, момент последнего изменения заказов, каталог и баннеры.
+    Кэш в памяти процесса видит только один воркер, и остальные отдают
+    устаревшие данные.
+    """
+    if settings.DEBUG:
+        return []
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            'Кэш хранится в памяти процесса, и воркеры не увидят изменений друг друга.',
+            hint='Укажите в CACHE_URL общий кэш, например redis://127.0.0.1:6379/1.',
+            id='star_burger.W001',
+            )
+        ]
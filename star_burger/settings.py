@@ -1,4 +1,5 @@
 import os
+import datetime
 import rollbar
 import dj_database_url
 
@@ -9,6 +10,30 @@ from git import Repo
 env = Env()
 env.read_env()
 YA_GEO_APIKEY = env('YA_GEO_APIKEY')
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', 10)
+GEOCODER_BACKGROUND_WORKERS = env.int('GEOCODER_BACKGROUND_WORKERS', 2)
+GEOCODER_BACKEND = env('GEOCODER_BACKEND', 'places.geocoder.YandexGeocoder')
+GEOCODER_FIXTURE = env('GEOCODER_FIXTURE', None)
+GEOCODER_CONNECT_TIMEOUT = env.float('GEOCODER_CONNECT_TIMEOUT', 3.05)
+GEOCODER_READ_TIMEOUT = env.float('GEOCODER_READ_TIMEOUT', 5)
+GEOCODER_RETRIES = env.int('GEOCODER_RETRIES', 2)
+GEOCODER_BACKOFF_FACTOR = env.float('GEOCODER_BACKOFF_FACTOR', 0.3)
+GEOCODER_REQUEST_BUDGET = env.float('GEOCODER_REQUEST_BUDGET', 3)
+GEOCODER_BREAKER_FAILURES = env.int('GEOCODER_BREAKER_FAILURES', 5)
+GEOCODER_BREAKER_SLOW_CALL = env.float('GEOCODER_BREAKER_SLOW_CALL', 3)
+GEOCODER_BREAKER_RESET_TIMEOUT = env.float('GEOCODER_BREAKER_RESET_TIMEOUT', 30)
+RESTAURANTS_INDEX_CELL_KM = env.float('RESTAURANTS_INDEX_CELL_KM', 2)
+NEAREST_RESTAURANTS_COUNT = env.int('NEAREST_RESTAURANTS_COUNT', 5)
+NEAREST_RESTAURANTS_RADIUS_KM = env.float('NEAREST_RESTAURANTS_RADIUS_KM', None)
+ORDERS_PAGE_SIZE = env.int('ORDERS_PAGE_SIZE', 50)
+PRODUCTS_PAGE_SIZE = env.int('PRODUCTS_PAGE_SIZE', 20)
+PRODUCTS_PAGE_MAX_SIZE = env.int('PRODUCTS_PAGE_MAX_SIZE', 100)
+ORDERS_LONG_POLL_TIMEOUT = env.float('ORDERS_LONG_POLL_TIMEOUT', 20)
+ORDERS_POLL_INTERVAL = env.float('ORDERS_POLL_INTERVAL', 0.5)
+ORDERS_CHANGES_OVERLAP = datetime.timedelta(seconds=2)
+AVAILABILITY_CACHE_TIMEOUT = env.int('AVAILABILITY_CACHE_TIMEOUT', 24 * 60 * 60)
+PLACE_TTL = datetime.timedelta(days=env.int('PLACE_TTL_DAYS', 30))
+PLACE_NEGATIVE_TTL = datetime.timedelta(hours=env.int('PLACE_NEGATIVE_TTL_HOURS', 6))
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -98,6 +123,22 @@ WSGI_APPLICATION = 'star_burger.wsgi.application'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+PRODUCT_IMAGE_WIDTHS = env.list('PRODUCT_IMAGE_WIDTHS', [160, 320, 640], subcast=int)
+PRODUCT_IMAGE_QUALITY = env.int('PRODUCT_IMAGE_QUALITY', 80)
+
+BANNERS_MAX_AGE = env.int('BANNERS_MAX_AGE', 600)
+
+CATALOG_SNAPSHOT_ROOT = env('CATALOG_SNAPSHOT_ROOT', os.path.join(MEDIA_ROOT, 'catalog'))
+CATALOG_SNAPSHOT_KEEP = env.int('CATALOG_SNAPSHOT_KEEP', 5)
+
+
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', default='locmem://'),
+}
+PLACES_CACHE_SIZE = env.int('PLACES_CACHE_SIZE', 10000)
+PLACES_LOCAL_CACHE_TIMEOUT = env.int('PLACES_LOCAL_CACHE_TIMEOUT', 60)
+PLACES_CACHE_TIMEOUT = env.int('PLACES_CACHE_TIMEOUT', 24 * 60 * 60)
+
 
 DB_URL = os.getenv('DB_URL')
 DATABASES = {
@@ -0,0 +1,57 @@
+import difflib
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def normalize_sql(sql):
+    """Убрать из запроса конкретные значения, чтобы сравнивать только его форму."""
+    sql = re.sub(r'\bIN \([^)]*\)', 'IN (...)', sql)
+    sql = re.sub(r"'[^']*'", "'?'", sql)
+    return re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+
+
+class QueryBudgetMixin:
+    """Проверки для TestCase, что число SQL-запросов не растёт вместе с данными.
+
+    assertQueryBudget наполняет базу порциями до каждого из размеров sizes
+    и после каждой порции выполняет проверяемый код. Тест падает, если на
+    каком-то размере запросов больше budget или не столько же, сколько
+    на наименьшем размере. В сообщении — diff запросов между размерами,
+    в котором видно, какие запросы добавились.
+    """
+    query_budget_sizes = (1, 5, 25)
+
+    def capture_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return [query['sql'] for query in context.captured_queries]
+
+    def assertQueryBudget(self, budget, seed, func, sizes=None):
+        sizes = sizes or self.query_budget_sizes
+        seeded = 0
+        captured = {}
+        for size in sizes:
+            seed(size - seeded)
+            seeded = size
+            captured[size] = self.capture_queries(func)
+
+        smallest_size = sizes[0]
+        baseline = captured[smallest_size]
+        for size, queries in captured.items():
+            if len(queries) <= budget and len(queries) == len(baseline):
+                continue
+            diff = '\n'.join(difflib.unified_diff(
+                [normalize_sql(sql) for sql in baseline],
+                [normalize_sql(sql) for sql in queries],
+                fromfile=f'{smallest_size} записей: {len(baseline)} запросов',
+                tofile=f'{size} записей: {len(queries)} запросов',
+                lineterm=''
+                ))
+            if not diff:
+                diff = '\n'.join(queries)
+            self.fail(
+                f'Бюджет {budget} запросов нарушен на {size} записях '
+                f'({len(queries)} запросов):\n{diff}'
+                )